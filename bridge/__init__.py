@@ -5,6 +5,7 @@ Provides modular components for the Yarbo Bridge REST API:
   - config: Configuration and logging
   - auth: Auth0 token management
   - cache: TTL-based response caching
+  - http_session: Pooled keep-alive HTTP session for cloud calls
   - api_client: Yarbo cloud REST API wrapper
   - mqtt_client: Robot local MQTT client
   - map_utils: Coordinate conversion, map geometry, plan events, calendar
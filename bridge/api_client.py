@@ -4,13 +4,18 @@ Yarbo cloud REST API client.
 
 import json
 
-import requests as http_requests
 from fastapi import HTTPException
 
 from bridge.config import CONFIG, log
+from bridge.http_session import SESSION
 from bridge.auth import TokenManager
 from bridge.cache import Cache
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 class YarboAPI:
     """Wrapper around Yarbo's cloud REST API."""
@@ -22,105 +27,86 @@ class YarboAPI:
         self._tokens = tokens
         self._cache = cache
 
-    def _get(self, path: str, base: str = None) -> dict:
+    def _request(self, method: str, path: str, body: dict = None, base: str = None) -> dict:
+        """Call the cloud API and return the ``data`` field of its envelope."""
         url = (base or self.BASE) + path
-        r = http_requests.get(url, headers=self._tokens.get_headers(), timeout=15)
+        headers = self._tokens.get_headers()
+        r = SESSION.request(method, url, headers=headers, json=body, timeout=15)
         if r.status_code == 401:
             # Token expired mid-flight, force refresh and retry
-            self._tokens.access_token = None
-            r = http_requests.get(url, headers=self._tokens.get_headers(), timeout=15)
+            self._tokens.expire(headers)
+            r = SESSION.request(method, url, headers=self._tokens.get_headers(), json=body, timeout=15)
         if r.status_code != 200:
             raise HTTPException(status_code=r.status_code, detail=r.text[:1000])
-        data = r.json()
+        data = orjson.loads(r.content) if orjson else r.json()
         if data.get("code") != "00000":
             raise HTTPException(status_code=502, detail=data.get("message", "API error"))
         return data["data"]
 
-    def _post(self, path: str, body: dict, base: str = None) -> dict:
-        url = (base or self.BASE) + path
-        r = http_requests.post(url, headers=self._tokens.get_headers(), json=body, timeout=15)
-        if r.status_code == 401:
-            self._tokens.access_token = None
-            r = http_requests.post(url, headers=self._tokens.get_headers(), json=body, timeout=15)
-        if r.status_code != 200:
-            raise HTTPException(status_code=r.status_code, detail=r.text[:1000])
-        data = r.json()
-        if data.get("code") != "00000":
-            raise HTTPException(status_code=502, detail=data.get("message", "API error"))
-        return data["data"]
+    def _get(self, path: str, base: str = None) -> dict:
+        return self._request("GET", path, base=base)
 
-    # ── Device ──
+    def _post(self, path: str, body: dict, base: str = None) -> dict:
+        return self._request("POST", path, body, base)
 
     def get_devices(self) -> list:
-        cached = self._cache.get("devices", CONFIG["cache_ttl_device"])
-        if cached is not None:
-            return cached
-        data = self._get("/yarbo/robot-service/commonUser/userRobotBind/getUserRobotBindVos")
-        result = data.get("deviceList", [])
-        self._cache.set("devices", result)
-        return result
+        def fetch():
+            data = self._get("/yarbo/robot-service/commonUser/userRobotBind/getUserRobotBindVos")
+            return data.get("deviceList", [])
+        return self._cache.get_or_refresh("devices", CONFIG["cache_ttl_device"], fetch)
 
     def get_user_info(self) -> dict:
-        cached = self._cache.get("user_info", CONFIG["cache_ttl_device"])
-        if cached is not None:
-            return cached
-        data = self._get("/yarbo/robot-service/robot/commonUser/getUesrInfo")
-        self._cache.set("user_info", data)
-        return data
+        return self._cache.get_or_refresh(
+            "user_info", CONFIG["cache_ttl_device"],
+            lambda: self._get("/yarbo/robot-service/robot/commonUser/getUesrInfo"))
 
     # ── Map ──
 
     def get_map(self, sn: str) -> dict:
-        cached = self._cache.get(f"map_{sn}", CONFIG["cache_ttl_map"])
-        if cached is not None:
-            return cached
-        data = self._get(f"/yarbo/commonUser/getUploadMap?sn={sn}")
-        maps = data.get("mapList", [])
-        if not maps:
-            return {}
-        map_json = json.loads(maps[0].get("mapJson", "{}"))
-        self._cache.set(f"map_{sn}", map_json)
-        return map_json
+        def fetch():
+            data = self._get(f"/yarbo/commonUser/getUploadMap?sn={sn}")
+            maps = data.get("mapList", [])
+            if not maps:
+                return None  # not cached; retried on the next call
+            return json.loads(maps[0].get("mapJson", "{}"))
+        map_json = self._cache.get_or_refresh(f"map_{sn}", CONFIG["cache_ttl_map"], fetch)
+        return map_json if map_json is not None else {}
 
     def get_raster_background(self, sn: str) -> dict:
-        cached = self._cache.get(f"raster_{sn}", CONFIG["cache_ttl_map"])
-        if cached is not None:
-            return cached
-        data = self._get(f"/yarbo/robot/rasterBackground/get?sn={sn}")
-        self._cache.set(f"raster_{sn}", data)
-        return data
+        return self._cache.get_or_refresh(
+            f"raster_{sn}", CONFIG["cache_ttl_map"],
+            lambda: self._get(f"/yarbo/robot/rasterBackground/get?sn={sn}"))
 
     # ── Messages ──
 
     def get_messages(self, sn: str) -> list:
-        cached = self._cache.get(f"messages_{sn}", CONFIG["cache_ttl_messages"])
-        if cached is not None:
-            return cached
-        data = self._get(f"/yarbo/msg/userDeviceMsg?sn={sn}")
-        msgs = []
-        for dev_msg in data.get("deviceMsg", []):
-            for msg in dev_msg.get("msgs", []):
-                msgs.append(msg)
-        self._cache.set(f"messages_{sn}", msgs)
-        return msgs
+        def fetch():
+            data = self._get(f"/yarbo/msg/userDeviceMsg?sn={sn}")
+            msgs = []
+            for dev_msg in data.get("deviceMsg", []):
+                for msg in dev_msg.get("msgs", []):
+                    msgs.append(msg)
+            return msgs
+        return self._cache.get_or_refresh(f"messages_{sn}", CONFIG["cache_ttl_messages"], fetch)
+
+    def get_messages_head(self, sn: str, n: int = 20) -> list:
+        """Newest *n* messages, sliced from the cached list."""
+        return self.get_messages(sn)[:n]
 
     # ── Firmware ──
+    # Version info changes rarely, so a stale copy is served while it refreshes
 
     def get_firmware(self) -> dict:
-        cached = self._cache.get("firmware", CONFIG["cache_ttl_firmware"])
-        if cached is not None:
-            return cached
-        data = self._get("/yarbo/commonUser/getLatestPubVersion")
-        self._cache.set("firmware", data)
-        return data
+        return self._cache.get_or_refresh(
+            "firmware", CONFIG["cache_ttl_firmware"],
+            lambda: self._get("/yarbo/commonUser/getLatestPubVersion"),
+            stale_ttl=CONFIG["cache_ttl_firmware"] * 10)
 
     def get_dc_version(self, sn: str) -> dict:
-        cached = self._cache.get(f"dc_version_{sn}", CONFIG["cache_ttl_firmware"])
-        if cached is not None:
-            return cached
-        data = self._post("/yarbo/robot/getDcVersion", {"sn": sn})
-        self._cache.set(f"dc_version_{sn}", data)
-        return data
+        return self._cache.get_or_refresh(
+            f"dc_version_{sn}", CONFIG["cache_ttl_firmware"],
+            lambda: self._post("/yarbo/robot/getDcVersion", {"sn": sn}),
+            stale_ttl=CONFIG["cache_ttl_firmware"] * 10)
 
     # ── Notifications ──
 
@@ -145,10 +131,11 @@ class YarboAPI:
     #     """Get Agora RTC token + encryption config for video streaming."""
     #     url = self.BASE + "/yarbo/robot-service/robot/commonUser/getAgoraToken"
     #     body = {"sn": sn, "channel_name": sn, "uid": uid}
-    #     r = http_requests.post(url, headers=self._tokens.get_headers(), json=body, timeout=15)
+    #     headers = self._tokens.get_headers()
+    #     r = SESSION.post(url, headers=headers, json=body, timeout=15)
     #     if r.status_code == 401:
-    #         self._tokens.access_token = None
-    #         r = http_requests.post(url, headers=self._tokens.get_headers(), json=body, timeout=15)
+    #         self._tokens.expire(headers)
+    #         r = SESSION.post(url, headers=self._tokens.get_headers(), json=body, timeout=15)
     #     if r.status_code != 200:
     #         raise HTTPException(status_code=r.status_code, detail=r.text[:1000])
     #     data = r.json()
@@ -4,11 +4,11 @@ Auth0 token lifecycle management for Yarbo Bridge.
 
 import time
 import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Optional
 
-import requests as http_requests
-
 from bridge.config import CONFIG, log
+from bridge.http_session import SESSION
 
 
 class TokenManager:
@@ -19,6 +19,10 @@ class TokenManager:
         self.refresh_token: Optional[str] = None
         self.expires_at: float = 0
         self._lock = threading.Lock()
+        # At most one Auth0 call in flight; concurrent callers wait on its future
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="auth0")
+        self._refresh_future: Optional[Future] = None
+        self._headers: tuple = ("", {})  # (token, headers dict built for it)
 
         # Load initial tokens if available
         if CONFIG.get("initial_access_token"):
@@ -51,7 +55,7 @@ class TokenManager:
             "username": CONFIG["email"],
             "password": CONFIG["password"],
         }
-        r = http_requests.post(url, json=payload, timeout=15)
+        r = SESSION.post(url, json=payload, timeout=15)
         if r.status_code != 200:
             log.error(f"Auth0 password login failed: {r.status_code} {r.text[:200]}")
             raise RuntimeError(f"Auth0 login failed: {r.status_code}")
@@ -74,7 +78,7 @@ class TokenManager:
             "client_id": CONFIG["auth0_client_id"],
             "refresh_token": self.refresh_token,
         }
-        r = http_requests.post(url, json=payload, timeout=15)
+        r = SESSION.post(url, json=payload, timeout=15)
         if r.status_code != 200:
             log.warning(f"Token refresh failed ({r.status_code}), trying password login")
             try:
@@ -90,19 +94,49 @@ class TokenManager:
         self.expires_at = time.time() + data.get("expires_in", 86400) - 300
         log.info("Token refreshed successfully")
 
+    def _renew(self):
+        """Refresh if we have a refresh token, otherwise log in."""
+        if self.refresh_token:
+            self._refresh()
+        else:
+            self._login()
+
     def get_token(self) -> str:
         """Get a valid access token, refreshing if needed."""
+        token = self.access_token
+        if token and time.time() < self.expires_at:
+            return token
         with self._lock:
-            if not self.access_token or time.time() >= self.expires_at:
-                if self.refresh_token:
-                    self._refresh()
-                else:
-                    self._login()
-            return self.access_token
+            if self._refresh_future is None or self._refresh_future.done():
+                self._refresh_future = self._executor.submit(self._renew)
+            future = self._refresh_future
+        # No timeout here: every Auth0 call in _renew is itself bounded, and a
+        # refresh falling back to login (with session retries) can run past
+        # any fixed budget while still succeeding
+        future.result()
+        return self.access_token
+
+    def expire(self, headers: dict):
+        """Mark the token used in *headers* as rejected (HTTP 401).
+
+        Only expires it if nobody has replaced it yet, so a burst of 401s
+        triggers a single refresh.
+        """
+        with self._lock:
+            if self.access_token and headers.get("Authorization") == f"Bearer {self.access_token}":
+                self.expires_at = 0
 
     def get_headers(self) -> dict:
-        """Get HTTP headers with valid auth token."""
-        return {
-            "Authorization": f"Bearer {self.get_token()}",
-            "Content-Type": "application/json",
-        }
+        """Get HTTP headers with valid auth token.
+
+        The same dict is returned until the token changes; don't mutate it.
+        """
+        token = self.get_token()
+        cached_token, headers = self._headers
+        if token != cached_token:
+            headers = {
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json",
+            }
+            self._headers = (token, headers)
+        return headers
@@ -4,7 +4,13 @@ Simple TTL cache for API responses.
 
 import time
 import threading
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from bridge.config import log
+
+# Background refreshes for stale-while-revalidate entries
+_refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
 
 
 class Cache:
@@ -13,6 +19,7 @@ class Cache:
     def __init__(self):
         self._store: dict = {}
         self._lock = threading.Lock()
+        self._key_locks: dict = {}   # key → Lock while a fetch is pending, so only one runs
 
     def get(self, key: str, ttl: int) -> Optional[dict]:
         with self._lock:
@@ -23,7 +30,7 @@ class Cache:
 
     def set(self, key: str, data: dict):
         with self._lock:
-            self._store[key] = {"data": data, "ts": time.time()}
+            self._store[key] = {"data": data, "ts": time.time(), "refreshing": False}
 
     def invalidate(self, key: str = None):
         with self._lock:
@@ -31,3 +38,64 @@ class Cache:
                 self._store.pop(key, None)
             else:
                 self._store.clear()
+
+    def get_or_refresh(self, key: str, ttl: int, fetch: Callable, stale_ttl: int = None):
+        """Return the cached value for *key*, fetching it with *fetch()* as needed.
+
+        Fresh entries are returned as-is. With *stale_ttl* set, entries older
+        than *ttl* but within *stale_ttl* are returned immediately while one
+        background refresh runs; by default there is no stale window. Otherwise
+        *fetch* is called inline, one caller per key; if it fails and an old
+        entry exists, that entry is served. A *fetch* result of None is
+        returned but not cached.
+        """
+        with self._lock:
+            entry = self._store.get(key)
+            age = time.time() - entry["ts"] if entry else None
+            if entry and age < ttl:
+                return entry["data"]
+            if entry and stale_ttl is not None and age < stale_ttl:
+                if not entry["refreshing"]:
+                    entry["refreshing"] = True
+                    _refresh_pool.submit(self._refresh, key, fetch)
+                return entry["data"]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            try:
+                # Another caller may have filled it while we waited
+                cached = self.get(key, ttl)
+                if cached is not None:
+                    return cached
+                try:
+                    data = fetch()
+                except Exception:
+                    with self._lock:
+                        entry = self._store.get(key)
+                    if entry is None:
+                        raise
+                    log.warning("Refresh of %s failed, serving stale copy", key, exc_info=True)
+                    return entry["data"]
+                if data is not None:
+                    self.set(key, data)
+                return data
+            finally:
+                # Only needed while a fetch is pending; don't keep one per key forever
+                with self._lock:
+                    if self._key_locks.get(key) is key_lock:
+                        del self._key_locks[key]
+
+    def _refresh(self, key: str, fetch: Callable):
+        """Background half of :meth:`get_or_refresh`."""
+        try:
+            data = fetch()
+        except Exception as e:
+            log.warning("Background refresh of %s failed: %s", key, e)
+            data = None
+        if data is not None:
+            self.set(key, data)
+            return
+        with self._lock:
+            entry = self._store.get(key)
+            if entry:
+                entry["refreshing"] = False
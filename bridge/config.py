@@ -54,6 +54,8 @@ CONFIG = {
     "cache_ttl_messages": 120,    # 2 min
     "cache_ttl_firmware": 3600,   # 1 hour
     "cache_ttl_status": 30,       # 30 sec (MQTT-fed)
+    "cache_ttl_geometry": 60,     # 1 min (also invalidated on MQTT map updates)
+    "cache_ttl_ha_sensors": 2,    # 2 sec (also invalidated on MQTT state changes)
 
     # Home Assistant integration (for calendar-based schedule blocking)
     "ha_url": os.environ.get("HA_URL", "http://homeassistant.local:8123"),
@@ -68,6 +70,13 @@ CONFIG = {
     # MQTT Traffic Logging
     "mqtt_log_enabled": os.environ.get("YARBO_MQTT_LOG", "false").lower() == "true",
     "mqtt_log_file": os.environ.get("YARBO_MQTT_LOG_FILE", "/opt/yarbo-bridge/mqtt_traffic.log"),
+
+    # Map outlines: Douglas–Peucker tolerance in meters. Lossy, so off by
+    # default (0 = keep every vertex); e.g. 0.05 drops near-collinear points
+    "map_simplify_m": float(os.environ.get("YARBO_MAP_SIMPLIFY_M", "0")),
+
+    # Debug: add Server-Timing headers (geo / plans / render) to the dashboard
+    "server_timing": os.environ.get("YARBO_SERVER_TIMING", "false").lower() == "true",
 }
 
 # ─── Logging ─────────────────────────────────────────────────────────────────
@@ -0,0 +1,39 @@
+"""
+Shared HTTP sessions for cloud calls (Yarbo API Gateway, Auth0) and the
+Home Assistant calendar check.
+
+Pooled ``requests.Session`` objects keep TCP/TLS connections alive between
+calls instead of handshaking on every cache miss or dashboard poll.
+"""
+
+import requests as http_requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def _new_session() -> http_requests.Session:
+    session = http_requests.Session()
+    # Retry idempotent requests on gateway hiccups; give the caller the final
+    # response (raise_on_status=False) so existing status handling still applies.
+    retry = Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504),
+                  raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+SESSION = _new_session()
+
+
+def _new_ha_session() -> http_requests.Session:
+    # No retries: the calendar check runs on every dashboard poll and already
+    # degrades to "not busy" on error, so a down HA should fail fast.
+    session = http_requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+HA_SESSION = _new_ha_session()
@@ -4,16 +4,26 @@ Map utilities: coordinate conversion, geometry parsing, plan event helpers.
 
 import json
 import math
+import threading
+import time
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
+from types import MappingProxyType
 from typing import Optional
 
 from bridge.config import CONFIG, log
+from bridge.http_session import HA_SESSION
 
 try:
-    import requests as http_requests
+    import numpy as np
 except ImportError:
-    http_requests = None
+    np = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 # ── Coordinate conversion ────────────────────────────────────────────────
@@ -31,9 +41,217 @@ def local_to_gps(x: float, y: float, ref_lat: float, ref_lon: float) -> tuple:
     return lat, lon
 
 
+@lru_cache(maxsize=64)
+def make_local_to_gps(ref_lat: float, ref_lon: float):
+    """Return ``f(x, y) -> (lat, lon)`` for one reference point.
+
+    Same result as :func:`local_to_gps`, but the meters-per-degree-longitude
+    divisor (a cos/radians pair) is computed once per reference instead of
+    once per point. Converters are cached per (ref_lat, ref_lon).
+    """
+    lon_div = 111320.0 * math.cos(math.radians(ref_lat))
+
+    def convert(x: float, y: float) -> tuple:
+        return ref_lat + y / 111320.0, ref_lon - x / lon_div
+    return convert
+
+
+# Below this many points the per-point converter beats NumPy's setup cost
+_VECTOR_MIN_POINTS = 32
+
+
+def split_xy(pts: list) -> tuple:
+    """``[{"x":..,"y":..}, ...]`` → ``(xs, ys)`` lists (structure of arrays).
+
+    The geometry builders split each outline once and keep the two lists,
+    so projection, bounds and SVG rendering never go back to the dicts.
+    """
+    return [p["x"] for p in pts], [p["y"] for p in pts]
+
+
+def simplify_xy(xs: list, ys: list, tol: float) -> tuple:
+    """Ramer–Douglas–Peucker simplification of a local x/y polyline.
+
+    Drops vertices closer than *tol* meters to the line through their kept
+    neighbours; the first and last points are always kept. Returns the
+    inputs unchanged when *tol* <= 0 or there is nothing to drop.
+    """
+    n = len(xs)
+    if tol <= 0 or n < 3:
+        return xs, ys
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    tol2 = tol * tol
+    stack = [(0, n - 1)]
+    while stack:
+        i, j = stack.pop()
+        x0, y0 = xs[i], ys[i]
+        dx, dy = xs[j] - x0, ys[j] - y0
+        seg2 = dx * dx + dy * dy
+        best, idx = tol2, -1
+        for k in range(i + 1, j):
+            px, py = xs[k] - x0, ys[k] - y0
+            if seg2:
+                cross = dx * py - dy * px
+                d2 = cross * cross / seg2
+            else:  # closed ring: chord endpoints coincide
+                d2 = px * px + py * py
+            if d2 > best:
+                best, idx = d2, k
+        if idx >= 0:
+            keep[idx] = True
+            stack.append((i, idx))
+            stack.append((idx, j))
+    if all(keep):
+        return xs, ys
+    return [x for x, k in zip(xs, keep) if k], [y for y, k in zip(ys, keep) if k]
+
+
+def outline_xy(pts: list) -> tuple:
+    """:func:`split_xy` followed by :func:`simplify_xy` at ``map_simplify_m``.
+
+    Simplification is opt-in: with the default tolerance of 0 the points
+    are returned unchanged.
+    """
+    xs, ys = split_xy(pts)
+    tol = CONFIG["map_simplify_m"]
+    if tol <= 0:
+        return xs, ys
+    return simplify_xy(xs, ys, tol)
+
+
+# Projected coordinates are rounded to 7 decimals (~1 cm), far below GPS
+# accuracy; shorter floats make the map pages and GeoJSON noticeably smaller.
+_GPS_DECIMALS = 7
+
+
+def points_to_gps(xs: list, ys: list, ref_lat: float, ref_lon: float) -> list:
+    """Convert parallel *xs*/*ys* to ``[(lat, lon), ...]``.
+
+    Large outlines are projected in one pass with NumPy vector ops; short
+    ones (or no NumPy) use the cached :func:`make_local_to_gps` converter.
+    """
+    # Vertices shared between features (adjacent area corners) are projected
+    # again rather than interned: a projection is two float ops, cheaper than
+    # the dict lookup that would skip it
+    if np is None or len(xs) < _VECTOR_MIN_POINTS:
+        to_gps = make_local_to_gps(ref_lat, ref_lon)
+        return [(round(lat, _GPS_DECIMALS), round(lon, _GPS_DECIMALS))
+                for lat, lon in (to_gps(x, y) for x, y in zip(xs, ys))]
+    lon_div = 111320.0 * math.cos(math.radians(ref_lat))
+    lat = ref_lat + np.asarray(ys, dtype=np.float64) / 111320.0
+    lon = ref_lon - np.asarray(xs, dtype=np.float64) / lon_div
+    return list(zip(np.round(lat, _GPS_DECIMALS).tolist(), np.round(lon, _GPS_DECIMALS).tolist()))
+
+
+def local_centroid(xs: list, ys: list) -> Optional[tuple]:
+    """Mean of the local outline points as ``(cx, cy)``, or None if empty.
+
+    Stored on area features at build time so label placement doesn't rescan
+    the outline on every render.
+    """
+    if not xs:
+        return None
+    if np is None or len(xs) < _VECTOR_MIN_POINTS:
+        return sum(xs) / len(xs), sum(ys) / len(ys)
+    cx, cy = np.mean((xs, ys), axis=1).tolist()
+    return cx, cy
+
+
+def points_json(points: list) -> str:
+    """Serialize ``[(lat, lon), ...]`` as a JSON array of pairs.
+
+    Tuples encode as arrays, so no list-of-lists copy is made. Uses orjson
+    when installed (much faster on float-heavy arrays), else stdlib json.
+    """
+    if orjson is not None:
+        return orjson.dumps(points).decode()
+    return json.dumps(points)
+
+
+def points_bounds(points: list) -> Optional[list]:
+    """``[[min_lat, min_lon], [max_lat, max_lon]]`` of *points*, or None if empty."""
+    if not points:
+        return None
+    lats, lons = zip(*points)
+    return [[min(lats), min(lons)], [max(lats), max(lons)]]
+
+
+def join_bounds_json(*feature_lists) -> str:
+    """JSON bounding box over the given features, for Leaflet's fitBounds.
+
+    Combines the per-feature ``bounds`` stored by the geometry builders;
+    ``[]`` when none of the features has points.
+    """
+    boxes = [f["bounds"] for feats in feature_lists for f in feats if f["bounds"]]
+    if not boxes:
+        return "[]"
+    return points_json([[min(b[0][0] for b in boxes), min(b[0][1] for b in boxes)],
+                        [max(b[1][0] for b in boxes), max(b[1][1] for b in boxes)]])
+
+
+def as_lonlat(points: list, close: bool = False) -> list:
+    """Reorder (lat, lon) points into GeoJSON's [lon, lat] convention.
+
+    With ``close=True`` the first vertex is repeated to close a polygon ring.
+    """
+    coords = [[lon, lat] for lat, lon in points]
+    if close and coords:
+        coords.append(coords[0])
+    return coords
+
+
 # ── Map geometry ─────────────────────────────────────────────────────────
 
+# sn → (map_key, built_at, geo). Entries are dropped when the MQTT client
+# receives a new map (map_version changes) or after cache_ttl_geometry.
+_geo_cache: dict = {}
+_geo_lock = threading.Lock()
+_geo_build_locks: dict = {}   # sn → Lock, so only one build per robot runs
+
+
 def get_map_geometry(sn: str, api, mqtt_client) -> dict:
+    """Cached wrapper around :func:`build_map_geometry`.
+
+    Concurrent misses for the same robot wait for a single build.
+    The returned dict is shared between requests — treat it as read-only.
+    """
+    map_key = (id(mqtt_client), mqtt_client.map_version) if mqtt_client else None
+
+    def lookup():
+        with _geo_lock:
+            hit = _geo_cache.get(sn)
+        if hit and hit[0] == map_key and time.monotonic() - hit[1] < CONFIG["cache_ttl_geometry"]:
+            return hit[2]
+        return None
+
+    geo = lookup()
+    if geo is not None:
+        return geo
+    with _geo_lock:
+        build_lock = _geo_build_locks.setdefault(sn, threading.Lock())
+    with build_lock:
+        # Another request may have built it while we waited
+        geo = lookup()
+        if geo is not None:
+            return geo
+        now = time.monotonic()
+        geo = build_map_geometry(sn, api, mqtt_client)
+        with _geo_lock:
+            _geo_cache[sn] = (map_key, now, geo)
+    return geo
+
+
+def invalidate_map_geometry(sn: str = None):
+    """Drop cached geometry for *sn* (or for every robot if omitted)."""
+    with _geo_lock:
+        if sn:
+            _geo_cache.pop(sn, None)
+        else:
+            _geo_cache.clear()
+
+
+def build_map_geometry(sn: str, api, mqtt_client) -> dict:
     """Extract areas, pathways, charging points as GPS polygons.
 
     Prefers the MQTT map (live from robot or cached get_map.json) over
@@ -53,38 +271,49 @@ def get_map_geometry(sn: str, api, mqtt_client) -> dict:
     ref = map_data.get("ref", {}).get("ref", {})
     ref_lat = ref.get("latitude", 0)
     ref_lon = ref.get("longitude", 0)
+    to_gps = make_local_to_gps(ref_lat, ref_lon)
 
     areas_geo = []
     for area in map_data.get("area", []):
         pts = area.get("range", [])
-        gps_pts = [local_to_gps(p["x"], p["y"], ref_lat, ref_lon) for p in pts]
+        xs, ys = outline_xy(pts)
+        gps_pts = points_to_gps(xs, ys, ref_lat, ref_lon)
         areas_geo.append({
             "name": area.get("name", "Area"),
             "area_sqm": area.get("area", 0),
             "points": gps_pts,
-            "local_points": [(p["x"], p["y"]) for p in pts],
+            "points_json": points_json(gps_pts),
+            "bounds": points_bounds(gps_pts),
+            "xs": xs, "ys": ys,
+            "centroid": local_centroid(xs, ys),
         })
 
     pathways_geo = []
     for pw in map_data.get("pathway", []):
         pts = pw.get("range", [])
-        gps_pts = [local_to_gps(p["x"], p["y"], ref_lat, ref_lon) for p in pts]
+        xs, ys = outline_xy(pts)
+        gps_pts = points_to_gps(xs, ys, ref_lat, ref_lon)
         pathways_geo.append({
             "name": pw.get("name", "Pathway"),
             "points": gps_pts,
-            "local_points": [(p["x"], p["y"]) for p in pts],
+            "points_json": points_json(gps_pts),
+            "bounds": points_bounds(gps_pts),
+            "xs": xs, "ys": ys,
         })
 
     nogo_geo = []
     for nz in map_data.get("nogozone", []):
         pts = nz.get("range", [])
-        gps_pts = [local_to_gps(p["x"], p["y"], ref_lat, ref_lon) for p in pts]
-        nogo_geo.append({"name": "No-Go Zone", "points": gps_pts})
+        xs, ys = outline_xy(pts)
+        gps_pts = points_to_gps(xs, ys, ref_lat, ref_lon)
+        nogo_geo.append({"name": "No-Go Zone", "points": gps_pts,
+                         "points_json": points_json(gps_pts),
+                         "bounds": points_bounds(gps_pts)})
 
     chargers = []
     for cp in map_data.get("chargingPoints", []):
         pt = cp.get("chargingPoint", {})
-        lat, lon = local_to_gps(pt.get("x", 0), pt.get("y", 0), ref_lat, ref_lon)
+        lat, lon = to_gps(pt.get("x", 0), pt.get("y", 0))
         chargers.append({"lat": lat, "lon": lon, "enabled": cp.get("enable", False)})
 
     # Snow pile zones (within each area)
@@ -92,23 +321,29 @@ def get_map_geometry(sn: str, api, mqtt_client) -> dict:
     for area in map_data.get("area", []):
         for sp in area.get("snowPiles", []):
             pts = sp.get("range", [])
-            gps_pts = [local_to_gps(p["x"], p["y"], ref_lat, ref_lon) for p in pts]
+            xs, ys = outline_xy(pts)
+            gps_pts = points_to_gps(xs, ys, ref_lat, ref_lon)
             snow_piles_geo.append({
                 "name": "Snow Pile Zone",
                 "points": gps_pts,
-                "local_points": [(p["x"], p["y"]) for p in pts],
+                "points_json": points_json(gps_pts),
+                "bounds": points_bounds(gps_pts),
+                "xs": xs, "ys": ys,
             })
 
     # Sidewalks (cloud key is singular 'sidewalk')
     sidewalks_geo = []
     for sw in map_data.get("sidewalk", []):
         pts = sw.get("range", [])
-        gps_pts = [local_to_gps(p["x"], p["y"], ref_lat, ref_lon) for p in pts]
+        xs, ys = outline_xy(pts)
+        gps_pts = points_to_gps(xs, ys, ref_lat, ref_lon)
         sidewalks_geo.append({
             "id": sw.get("id"),
             "name": sw.get("name", "Sidewalk"),
             "points": gps_pts,
-            "local_points": [(p["x"], p["y"]) for p in pts],
+            "points_json": points_json(gps_pts),
+            "bounds": points_bounds(gps_pts),
+            "xs": xs, "ys": ys,
         })
 
     # Raster background image
@@ -119,8 +354,8 @@ def get_map_geometry(sn: str, api, mqtt_client) -> dict:
         tl = obj.get("top_left_real", {})
         br = obj.get("bottom_right_real", {})
         if tl and br:
-            tl_lat, tl_lon = local_to_gps(tl.get("x", 0), tl.get("y", 0), ref_lat, ref_lon)
-            br_lat, br_lon = local_to_gps(br.get("x", 0), br.get("y", 0), ref_lat, ref_lon)
+            tl_lat, tl_lon = to_gps(tl.get("x", 0), tl.get("y", 0))
+            br_lat, br_lon = to_gps(br.get("x", 0), br.get("y", 0))
             raster = {
                 "image_url": bg.get("accessUrl", ""),
                 "bounds": [[tl_lat, tl_lon], [br_lat, br_lon]],
@@ -137,6 +372,7 @@ def get_map_geometry(sn: str, api, mqtt_client) -> dict:
         "sidewalks": sidewalks_geo,
         "raster": raster,
         "raw": map_data,
+        "total_area_sqm": round(sum(a["area_sqm"] for a in areas_geo), 1),
         "_source": "Cloud API (may be stale)",
     }
 
@@ -160,13 +396,14 @@ def get_mqtt_map_geometry(mqtt_map_data) -> dict:
             return {"ref_lat": 0, "ref_lon": 0, "areas": [], "pathways": [],
                     "nogo": [], "chargers": [], "snow_piles": [],
                     "sidewalks": [], "raster": None, "raw": None,
-                    "_source": "MQTT (parse error)"}
+                    "total_area_sqm": 0, "_source": "MQTT (parse error)"}
     # Use first area's ref as the global reference
     areas = mqtt_map_data.get("areas", [])
     ref_lat, ref_lon = 0, 0
     if areas and "ref" in areas[0]:
         ref_lat = areas[0]["ref"].get("latitude", 0)
         ref_lon = areas[0]["ref"].get("longitude", 0)
+    to_gps = make_local_to_gps(ref_lat, ref_lon)
 
     areas_geo = []
     snow_piles_geo = []
@@ -175,24 +412,31 @@ def get_mqtt_map_geometry(mqtt_map_data) -> dict:
         a_ref = area.get("ref", {})
         a_ref_lat = a_ref.get("latitude", ref_lat)
         a_ref_lon = a_ref.get("longitude", ref_lon)
-        gps_pts = [local_to_gps(p["x"], p["y"], a_ref_lat, a_ref_lon) for p in pts]
+        xs, ys = outline_xy(pts)
+        gps_pts = points_to_gps(xs, ys, a_ref_lat, a_ref_lon)
         areas_geo.append({
             "id": area.get("id"),
             "name": area.get("name", "Area"),
             "area_sqm": area.get("area", 0),
             "points": gps_pts,
-            "local_points": [(p["x"], p["y"]) for p in pts],
+            "points_json": points_json(gps_pts),
+            "bounds": points_bounds(gps_pts),
+            "xs": xs, "ys": ys,
+            "centroid": local_centroid(xs, ys),
         })
         for sp in area.get("snowPiles", []):
             sp_pts = sp.get("range", [])
             sp_ref = sp.get("ref", a_ref)
             sp_ref_lat = sp_ref.get("latitude", a_ref_lat)
             sp_ref_lon = sp_ref.get("longitude", a_ref_lon)
-            sp_gps = [local_to_gps(p["x"], p["y"], sp_ref_lat, sp_ref_lon) for p in sp_pts]
+            sp_xs, sp_ys = outline_xy(sp_pts)
+            sp_gps = points_to_gps(sp_xs, sp_ys, sp_ref_lat, sp_ref_lon)
             snow_piles_geo.append({
                 "name": "Snow Pile Zone",
                 "points": sp_gps,
-                "local_points": [(p["x"], p["y"]) for p in sp_pts],
+                "points_json": points_json(sp_gps),
+                "bounds": points_bounds(sp_gps),
+                "xs": sp_xs, "ys": sp_ys,
             })
 
     pathways_geo = []
@@ -201,11 +445,14 @@ def get_mqtt_map_geometry(mqtt_map_data) -> dict:
         pw_ref = pw.get("ref", {})
         pw_ref_lat = pw_ref.get("latitude", ref_lat)
         pw_ref_lon = pw_ref.get("longitude", ref_lon)
-        gps_pts = [local_to_gps(p["x"], p["y"], pw_ref_lat, pw_ref_lon) for p in pts]
+        xs, ys = outline_xy(pts)
+        gps_pts = points_to_gps(xs, ys, pw_ref_lat, pw_ref_lon)
         pathways_geo.append({
             "name": pw.get("name", "Pathway"),
             "points": gps_pts,
-            "local_points": [(p["x"], p["y"]) for p in pts],
+            "points_json": points_json(gps_pts),
+            "bounds": points_bounds(gps_pts),
+            "xs": xs, "ys": ys,
         })
 
     nogo_geo = []
@@ -214,17 +461,20 @@ def get_mqtt_map_geometry(mqtt_map_data) -> dict:
         nz_ref = nz.get("ref", {})
         nz_ref_lat = nz_ref.get("latitude", ref_lat)
         nz_ref_lon = nz_ref.get("longitude", ref_lon)
-        gps_pts = [local_to_gps(p["x"], p["y"], nz_ref_lat, nz_ref_lon) for p in pts]
+        xs, ys = outline_xy(pts)
+        gps_pts = points_to_gps(xs, ys, nz_ref_lat, nz_ref_lon)
         nogo_geo.append({
             "name": nz.get("name", "No-Go Zone"),
             "points": gps_pts,
+            "points_json": points_json(gps_pts),
+            "bounds": points_bounds(gps_pts),
             "enabled": nz.get("enable", True),
         })
 
     chargers = []
     for cp in mqtt_map_data.get("allchargingData", []):
         pt = cp.get("chargingPoint", {})
-        lat, lon = local_to_gps(pt.get("x", 0), pt.get("y", 0), ref_lat, ref_lon)
+        lat, lon = to_gps(pt.get("x", 0), pt.get("y", 0))
         chargers.append({
             "lat": lat, "lon": lon,
             "enabled": cp.get("enable", False),
@@ -237,11 +487,14 @@ def get_mqtt_map_geometry(mqtt_map_data) -> dict:
         sw_ref = sw.get("ref", {})
         sw_ref_lat = sw_ref.get("latitude", ref_lat)
         sw_ref_lon = sw_ref.get("longitude", ref_lon)
-        gps_pts = [local_to_gps(p["x"], p["y"], sw_ref_lat, sw_ref_lon) for p in pts]
+        xs, ys = outline_xy(pts)
+        gps_pts = points_to_gps(xs, ys, sw_ref_lat, sw_ref_lon)
         sidewalks_geo.append({
             "id": sw.get("id"),
             "name": sw.get("name", "Sidewalk"),
             "points": gps_pts,
+            "points_json": points_json(gps_pts),
+            "bounds": points_bounds(gps_pts),
         })
 
     elec_fence = []
@@ -250,10 +503,13 @@ def get_mqtt_map_geometry(mqtt_map_data) -> dict:
         ef_ref = ef.get("ref", {})
         ef_ref_lat = ef_ref.get("latitude", ref_lat)
         ef_ref_lon = ef_ref.get("longitude", ref_lon)
-        gps_pts = [local_to_gps(p["x"], p["y"], ef_ref_lat, ef_ref_lon) for p in pts]
+        xs, ys = outline_xy(pts)
+        gps_pts = points_to_gps(xs, ys, ef_ref_lat, ef_ref_lon)
         elec_fence.append({
             "name": "Electric Fence",
             "points": gps_pts,
+            "points_json": points_json(gps_pts),
+            "bounds": points_bounds(gps_pts),
         })
 
     return {
@@ -264,22 +520,34 @@ def get_mqtt_map_geometry(mqtt_map_data) -> dict:
         "sidewalks": sidewalks_geo,
         "elec_fence": elec_fence,
         "raster": None,  # No raster in MQTT data
+        "total_area_sqm": round(sum(a["area_sqm"] for a in areas_geo), 1),
     }
 
 
+_SAVED_MAP_FILE = Path(__file__).parent.parent / "mqtt" / "responses" / "get_map.json"
+_saved_map: tuple = (None, None)   # ((mtime_ns, size), parsed map) of _SAVED_MAP_FILE
+
+
 def load_mqtt_map(mqtt_client) -> Optional[dict]:
-    """Load MQTT map data from the live bridge cache or the saved response file."""
+    """Load MQTT map data from the live bridge cache or the saved response file.
+
+    The saved file is only re-read when its mtime or size changes.
+    """
+    global _saved_map
     if mqtt_client and mqtt_client._live_map:
         return mqtt_client._live_map
 
-    responses_file = Path(__file__).parent.parent / "mqtt" / "responses" / "get_map.json"
-    if responses_file.exists():
-        with open(responses_file) as f:
-            data = json.load(f)
+    try:
+        st = _SAVED_MAP_FILE.stat()
+    except OSError:
+        return None
+    stamp = (st.st_mtime_ns, st.st_size)
+    if _saved_map[0] != stamp:
+        raw = _SAVED_MAP_FILE.read_bytes()
+        data = orjson.loads(raw) if orjson else json.loads(raw)
         resp = data.get("response", {})
-        return resp.get("data", resp)
-
-    return None
+        _saved_map = (stamp, resp.get("data", resp))
+    return _saved_map[1]
 
 
 def build_raster_overlay_js(geo: dict) -> str:
@@ -287,22 +555,27 @@ def build_raster_overlay_js(geo: dict) -> str:
     raster = geo.get("raster")
     if not raster or not raster.get("image_url"):
         return "var rasterOverlay = null; // No raster background available"
-    bounds = raster["bounds"]
-    img_url = raster["image_url"]
-    lats = [bounds[0][0], bounds[1][0]]
-    lons = [bounds[0][1], bounds[1][1]]
-    sw = [min(lats), min(lons)]
-    ne = [max(lats), max(lons)]
+    (lat_a, lon_a), (lat_b, lon_b) = raster["bounds"]
+    return _raster_overlay_js(raster["image_url"], lat_a, lon_a, lat_b, lon_b)
+
+
+@lru_cache(maxsize=8)
+def _raster_overlay_js(img_url: str, lat_a: float, lon_a: float,
+                       lat_b: float, lon_b: float) -> str:
+    # The raster only changes with a new background upload, so the few
+    # distinct (url, bounds) pairs are rendered once.
+    sw = [min(lat_a, lat_b), min(lon_a, lon_b)]
+    ne = [max(lat_a, lat_b), max(lon_a, lon_b)]
     return (
         f"var rasterOverlay = L.imageOverlay('{img_url}', "
-        f"[{json.dumps(sw)}, {json.dumps(ne)}], "
+        f"{points_json([sw, ne])}, "
         f"{{opacity: 0.7}}).addTo(map);"
     )
 
 
 # ── Plan event helpers ───────────────────────────────────────────────────
 
-PLAN_CODE_PREFIXES = {"WP", "PP", "PS", "PC", "PF", "PE", "WE"}
+PLAN_CODE_PREFIXES = frozenset({"WP", "PP", "PS", "PC", "PF", "PE", "WE"})
 
 PLAN_CODE_DESCRIPTIONS = {
     "WP000": "Plan completed successfully",
@@ -353,33 +626,48 @@ PLAN_CODE_DESCRIPTIONS = {
 
 def is_plan_event(msg: dict) -> bool:
     """Check if a message is a work plan event based on error code."""
-    code = msg.get("errCode", "")
-    if not code:
-        return False
-    prefix = code[:2]
-    return prefix in PLAN_CODE_PREFIXES
-
+    return (msg.get("errCode") or "")[:2] in PLAN_CODE_PREFIXES
 
-def enrich_plan_event(msg: dict) -> dict:
-    """Add human-readable description and category to a plan event."""
-    code = msg.get("errCode", "")
-    description = PLAN_CODE_DESCRIPTIONS.get(code, msg.get("msgTitle", "Unknown plan event"))
 
+def plan_category(code: str) -> str:
+    """Timeline category of a plan event code."""
     if code == "WP000":
-        category = "completed"
-    elif code in ("PP001", "PP002", "PP010"):
-        category = "started"
-    elif code.startswith("PP"):
-        category = "info"
-    elif code.startswith("WP"):
-        category = "paused"
-    else:
-        category = "error"
+        return "completed"
+    if code in ("PP001", "PP002", "PP010"):
+        return "started"
+    if code.startswith("PP"):
+        return "info"
+    if code.startswith("WP"):
+        return "paused"
+    return "error"
+
+
+# Categories of the known codes, resolved once; others fall back to plan_category()
+_PLAN_CODE_CATEGORIES = MappingProxyType({code: plan_category(code) for code in PLAN_CODE_DESCRIPTIONS})
+
+
+@lru_cache(maxsize=4096)
+def _iso_utc(ts) -> str:
+    """``gmtCreate`` → ISO-8601 UTC; cached, the same messages come back every poll."""
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+
+def enrich_plan_event(msg: dict, code: str = None) -> dict:
+    """Add human-readable description and category to a plan event.
+
+    *code* is the message's ``errCode`` if the caller already read it.
+    """
+    if code is None:
+        code = msg.get("errCode", "")
+    description = PLAN_CODE_DESCRIPTIONS.get(code)
+    if description is None:
+        description = msg.get("msgTitle", "Unknown plan event")
+    category = _PLAN_CODE_CATEGORIES.get(code) or plan_category(code)
 
     ts = msg.get("gmtCreate")
     return {
         "timestamp": ts,
-        "datetime": datetime.fromtimestamp(ts, tz=timezone.utc).isoformat() if ts else None,
+        "datetime": _iso_utc(ts) if ts else None,
         "code": code,
         "title": msg.get("msgTitle", ""),
         "description": description,
@@ -405,7 +693,7 @@ def check_calendar_busy() -> dict:
     url = f"{CONFIG['ha_url']}/api/states/{entity_id}"
     headers = {"Authorization": f"Bearer {CONFIG['ha_token']}"}
     try:
-        resp = http_requests.get(url, headers=headers, timeout=5)
+        resp = HA_SESSION.get(url, headers=headers, timeout=5)
         resp.raise_for_status()
         data = resp.json()
         state = data.get("state", "off")
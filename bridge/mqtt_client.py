@@ -2,17 +2,21 @@
 MQTT client for direct connection to the Yarbo robot's local broker.
 """
 
+import asyncio
 import json
 import time
 import zlib
 import gzip
-import io
 import ssl
-import uuid
+import secrets
 import threading
+import queue
 import logging
+from collections import deque
 from logging.handlers import RotatingFileHandler
 from datetime import datetime, timezone
+from functools import lru_cache, partial
+from types import MappingProxyType
 from typing import Optional
 
 from bridge.config import CONFIG, log
@@ -23,6 +27,107 @@ try:
 except ImportError:
     paho_mqtt = None
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Telemetry arrives at several Hz; orjson parses bytes directly and is much faster
+_json_loads = orjson.loads if orjson else json.loads
+
+# StateMSG / heart_beat working_state code → name
+WORKING_STATES = MappingProxyType({
+    0: "standby", 1: "idle", 2: "working", 3: "charging",
+    4: "docking", 5: "error", 6: "returning", 7: "paused",
+})
+
+# Legacy state code → name used by _decode_state (differs from WORKING_STATES)
+_DECODED_STATES = MappingProxyType({
+    0: "idle", 1: "working", 2: "paused", 3: "charging",
+    4: "error", 5: "docking", 6: "returning",
+})
+
+# Only control commands are tracked for HA (app/* topics that are NOT data requests)
+_CONTROL_TOPICS = (
+    "cmd_vel",            # Joystick movement
+    "cmd_roller",         # Roller/auger control
+    "set_working_state",  # Start/stop/pause/dock
+    "set_plan_roller",    # Enable roller for plans
+    "start_plan",         # Start plan execution
+    "stop",               # Emergency stop
+    "pause",              # Pause operation
+    "resume",             # Resume operation
+    "dock",               # Return to dock
+    "preview_plan_path",  # Plan preview
+)
+
+
+@lru_cache(maxsize=1)
+def _iso_second(sec: int) -> str:
+    return datetime.fromtimestamp(sec, timezone.utc).isoformat()
+
+
+def iso_now() -> str:
+    """UTC now as ISO 8601 at one-second resolution, formatted once per second."""
+    return _iso_second(int(time.time()))
+
+
+# Most queued MQTT messages handled per ingress batch (one state_version bump)
+_INGRESS_BATCH = 32
+
+_ZLIB_FLAGS = (b"\x01", b"\x5e", b"\x9c", b"\xda")
+
+# data_feedback topics stored verbatim: topic → _status key
+_FEEDBACK_STATUS_KEYS = MappingProxyType({
+    "electricInfo": "electric_info",
+    "rtkMSG": "rtk_status",
+    "motorInfo": "motor_info",
+    "bodyInfoMSG": "body_info",
+    "hubInfoMsg": "hub_info",
+    "ultrasonicMsg": "ultrasonic",
+    "velocityShow": "velocity",
+    "netStatusInfo": "net_status",
+    "visionInfo": "vision_info",
+    "mowerHeadInfo": "mower_head_info",
+    "ledInfoMsg": "led_info",
+    "odomInfo": "odom_info",
+    "SystemInfoFeedback": "system_info",
+})
+
+# data_feedback command responses stored verbatim: topic → attribute
+_FEEDBACK_LIVE_ATTRS = MappingProxyType({
+    "read_all_plan": "_live_plans",
+    "read_gps_ref": "_live_gps_ref",
+    "read_schedules": "_live_schedules",
+    "read_global_params": "_live_global_params",
+})
+# read_bundle() key → (command, payload); request() copies the payload
+_BUNDLE_READS = MappingProxyType({
+    "gps_ref": ("read_gps_ref", {}),
+    "schedules": ("read_schedules", {}),
+    "global_params": ("read_global_params", {"id": 1}),
+})
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class _FutureWaiter:
+    """``threading.Event`` stand-in for request(): ``set()`` (called on the
+    MQTT worker thread) wakes an asyncio future on its loop instead of a
+    blocked thread."""
+
+    __slots__ = ("_loop", "future")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self.future = loop.create_future()
+
+    def set(self):
+        self._loop.call_soon_threadsafe(_resolve, self.future)
+
 
 class YarboMQTTClient:
     """
@@ -50,13 +155,23 @@ class YarboMQTTClient:
                  port: int = 8883, use_tls: bool = True):
         self.robot_ip = robot_ip
         self.serial = serial
+        self._app_prefix = f"snowbot/{serial}/app/"          # + command
+        self._subscriptions = [(f"snowbot/{serial}/#", 0)]
         self.port = port
         self.use_tls = use_tls
         self._client = None
         self._connected = False
         self._lock = threading.Lock()
+        # Both hold an entry only while its send_command() / request() call is
+        # waiting: it is registered there and always removed in its finally block.
         self._command_responses: dict = {}   # req_id → response
-        self._response_events: dict = {}     # req_id → threading.Event
+        self._response_events: dict = {}     # req_id → threading.Event / _FutureWaiter
+        self._resp_lock = threading.Lock()   # guards the two dicts above
+        self._last_heartbeat_raw: bytes = b""  # skip re-decoding identical heartbeats
+        self._event_pool: deque = deque()    # cleared Events ready for reuse
+        # (command, payload JSON) → Task of the request() round trip in flight;
+        # only touched on the event loop
+        self._inflight: dict = {}
 
         # MQTT traffic logger (optional)
         self._mqtt_logger = None
@@ -88,15 +203,19 @@ class YarboMQTTClient:
             "system_info": {},
             "last_data_feedback": None,
         }
+        self._status_view = MappingProxyType(dict(self._status))  # see get()
 
         # ── command-response stores ──
         self._live_map: Optional[dict] = None
+        self._map_version: int = 0      # bumped on every get_map response
         self._live_plans = None
         self._live_gps_ref: Optional[dict] = None
         self._live_schedules = None
         self._live_global_params: Optional[dict] = None
         self._device_msg: Optional[dict] = None
+        self._device_msg_version: int = 0  # bumped on every DeviceMSG update
         self._preview_plan_path: Optional[dict] = None
+        self._state_version: int = 0    # bumped on anything endpoints report (ETags)
 
         # ── breadcrumb trail ──
         self._trail: list = []           # list of {"x": float, "y": float, "ts": float}
@@ -107,6 +226,12 @@ class YarboMQTTClient:
         self._control_commands: list = []  # Recent control commands (max 50)
         self._max_control_commands: int = 50
 
+        # ── ingress: paho's network thread only enqueues, a worker decodes ──
+        self._ingress: queue.Queue = queue.Queue(maxsize=1000)  # (topic, payload)
+        self._ingress_thread: Optional[threading.Thread] = None
+        self._ingress_stopping: bool = False  # stop() queued the worker's sentinel
+        self._ingress_dropped: int = 0
+
         # ── periodic refresh ──
         self._refresh_thread: Optional[threading.Thread] = None
         self._stop_refresh: threading.Event = threading.Event()
@@ -116,6 +241,9 @@ class YarboMQTTClient:
         self._rediscovery_in_progress: bool = False
         self._last_rediscovery: float = 0
 
+        # ── data_feedback dispatch (bound once; _status is never rebound) ──
+        self._feedback_handlers: dict = self._build_feedback_handlers()
+
     # ── MQTT traffic logging ─────────────────────────────────────────────
 
     def _setup_mqtt_logger(self):
@@ -169,8 +297,10 @@ class YarboMQTTClient:
                 "Set YARBO_ROBOT_IP to the robot's WiFi IP address."
             )
             return
+        if not self._start_ingress_thread():
+            return
 
-        cid = "yarbo-bridge-" + uuid.uuid4().hex[:8]
+        cid = "yarbo-bridge-" + secrets.token_hex(4)
         self._client = paho_mqtt.Client(
             client_id=cid,
             protocol=paho_mqtt.MQTTv311,
@@ -202,9 +332,19 @@ class YarboMQTTClient:
         if self._client:
             self._client.loop_stop()
             self._client.disconnect()
+            self._ingress_stopping = True
+            self._enqueue(None)  # stop the ingress worker after the backlog
+            if self._ingress_thread:
+                self._ingress_thread.join(timeout=2)
+                # Still draining: keep the reference so start() waits for it
+                # instead of running a second worker on the same queue
+                if not self._ingress_thread.is_alive():
+                    self._ingress_thread = None  # start() spawns a fresh one
             self._connected = False
             with self._lock:
                 self._status["connected"] = False
+                self._publish_status()
+            self._state_version += 1
 
     # ── callbacks ────────────────────────────────────────────────────────
 
@@ -215,12 +355,12 @@ class YarboMQTTClient:
             self._disconnect_count = 0  # reset on successful connect
             with self._lock:
                 self._status["connected"] = True
+                self._publish_status()
+            self._state_version += 1
 
-            sn = self.serial
             # Single wildcard to capture ALL topics (joystick, control, everything)
-            topics = [(f"snowbot/{sn}/#", 0)]
-            client.subscribe(topics)
-            log.info("Subscribed to blanket wildcard snowbot/%s/# (all topics)", sn)
+            client.subscribe(self._subscriptions)
+            log.info("Subscribed to blanket wildcard snowbot/%s/# (all topics)", self.serial)
 
             # Request full state on connect
             self._request_initial_state()
@@ -239,6 +379,8 @@ class YarboMQTTClient:
         self._connected = False
         with self._lock:
             self._status["connected"] = False
+            self._publish_status()
+        self._state_version += 1
 
         if self._disconnect_count <= 1:
             log.warning("Disconnected from robot MQTT (rc=%s), paho will auto-reconnect", reason_code)
@@ -258,25 +400,102 @@ class YarboMQTTClient:
         """Decompress zlib or gzip payload; return as-is if uncompressed."""
         try:
             if payload[:2] == b"\x1f\x8b":
-                with gzip.GzipFile(fileobj=io.BytesIO(payload)) as f:
-                    return f.read()
-            else:
+                return gzip.decompress(payload)
+            # zlib header: CMF 0x78 + FLG for each compression level
+            if payload[:1] == b"\x78" and payload[1:2] in _ZLIB_FLAGS:
                 return zlib.decompress(payload)
-        except Exception:
-            return payload
+        except (OSError, EOFError, zlib.error):
+            pass
+        return payload
 
     def _on_message(self, client, userdata, msg):
+        # Runs on paho's network thread: hand off and return immediately so
+        # slow processing can never stall keepalives.
+        self._enqueue((msg.topic, msg.payload))
+
+    def _enqueue(self, item):
+        """Queue *item* for the ingress worker, dropping the oldest if full."""
+        while True:
+            try:
+                self._ingress.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._ingress.get_nowait()
+                except queue.Empty:
+                    continue
+                self._ingress_dropped += 1
+                if self._ingress_dropped % 100 == 1:
+                    log.warning("MQTT ingress queue full — dropped %d message(s) so far",
+                                self._ingress_dropped)
+
+    def _start_ingress_thread(self) -> bool:
+        """Start the worker that decodes and dispatches queued MQTT messages.
+
+        Returns False if a stopped worker is still draining its backlog after
+        a grace period; starting a second one would split the queue.
+        """
+        worker = self._ingress_thread
+        if worker and worker.is_alive():
+            if not self._ingress_stopping:
+                return True
+            # A stopped worker is still draining; it exits on its sentinel
+            worker.join(timeout=10)
+            if worker.is_alive():
+                log.error("MQTT ingress worker still draining after stop — not restarting")
+                return False
+        self._ingress_stopping = False
+
+        def ingress_loop():
+            # Drain whatever has queued up behind the first message (at most
+            # _INGRESS_BATCH) and bump the state version once per batch, so a
+            # telemetry burst invalidates ETags / response memos only once.
+            get_nowait = self._ingress.get_nowait
+            while True:
+                item = self._ingress.get()
+                handled = 0
+                while item is not None:
+                    self._process_message(*item)
+                    handled += 1
+                    if handled == _INGRESS_BATCH:
+                        break
+                    try:
+                        item = get_nowait()
+                    except queue.Empty:
+                        break
+                if handled:
+                    self._state_version += 1
+                if item is None:
+                    return
+
+        self._ingress_thread = threading.Thread(target=ingress_loop, daemon=True,
+                                                name="mqtt-ingress")
+        self._ingress_thread.start()
+        return True
+
+    def _process_message(self, tp: str, payload: bytes):
         try:
-            raw = self._decompress(msg.payload)
+            if not payload:
+                return  # e.g. bare acks; nothing to decode
+
+            # Heartbeats are the most frequent frame and usually byte-identical
+            # to the previous one; only the receive time changes then.
+            if ("heart_beat" in tp and payload == self._last_heartbeat_raw
+                    and not self._mqtt_logger):
+                with self._lock:
+                    self._status["connected"] = True
+                    self._status["last_heartbeat"] = iso_now()
+                    self._publish_status()
+                return
+
+            raw = self._decompress(payload)
             raw_size = len(raw)
             try:
-                data = json.loads(raw.decode("utf-8"))
-            except (json.JSONDecodeError, UnicodeDecodeError):
-                log.debug("Non-JSON on %s: %s", msg.topic, raw[:100])
+                data = _json_loads(raw)
+            except ValueError:  # JSON / orjson decode errors and bad UTF-8
+                log.debug("Non-JSON on %s: %s", tp, raw[:100])
                 return
 
-            tp = msg.topic
-
             # Track control commands (before logging)
             self._track_control_command(tp, data)
 
@@ -286,14 +505,14 @@ class YarboMQTTClient:
             if "heart_beat" in tp:
                 with self._lock:
                     self._status["connected"] = True
-                    self._status["last_heartbeat"] = datetime.now(timezone.utc).isoformat()
+                    self._status["last_heartbeat"] = iso_now()
                     # Store working_state from heartbeat
                     if "working_state" in data:
                         ws_code = data["working_state"]
-                        state_map = {0: "standby", 1: "idle", 2: "working", 3: "charging",
-                                   4: "docking", 5: "error", 6: "returning", 7: "paused"}
-                        self._status["state"] = state_map.get(ws_code, "unknown")
+                        self._status["state"] = WORKING_STATES.get(ws_code, "unknown")
                         self._status["working_state_code"] = ws_code
+                    self._publish_status()
+                self._last_heartbeat_raw = payload
                 return
 
             if "data_feedback" in tp:
@@ -313,160 +532,154 @@ class YarboMQTTClient:
                             self._device_msg[key].update(value)
                         else:
                             self._device_msg[key] = value
+                    self._device_msg_version += 1
                 return
 
             if "/reply" in tp or "/ack" in tp:
                 self._handle_command_reply(data)
                 return
 
-            log.debug("MQTT other: %s → %s", tp, json.dumps(data)[:200])
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("MQTT other: %s → %s", tp, json.dumps(data)[:200])
 
         except Exception as e:
             log.error("Error processing MQTT message: %s", e)
 
+    def _build_feedback_handlers(self) -> dict:
+        """topic → handler(payload) for data_feedback; handlers run under _lock."""
+        handlers = {topic: partial(self._status.__setitem__, key)
+                    for topic, key in _FEEDBACK_STATUS_KEYS.items()}
+        handlers.update({topic: partial(setattr, self, attr)
+                         for topic, attr in _FEEDBACK_LIVE_ATTRS.items()})
+        handlers.update({
+            # ── telemetry ──
+            "batteryInfo": self._on_battery_info,
+            "runningStatus": self._on_running_status,
+            "stateInfo": self._on_state_info,
+            "get_connect_wifi_name": self._on_wifi_name,
+            # ── command responses ──
+            "get_map": self._on_live_map,
+            "get_device_msg": self._on_device_msg,
+            "preview_plan_path": self._on_preview_plan_path,
+        })
+        return handlers
+
     def _handle_data_feedback(self, data: dict):
         """Route data_feedback messages by their internal 'topic' field."""
         topic = data.get("topic", "")
         payload = data.get("data", data)
         req_id = data.get("req_id")
+        handler = self._feedback_handlers.get(topic)
 
         with self._lock:
-            self._status["last_data_feedback"] = datetime.now(timezone.utc).isoformat()
-
-            # ── telemetry ──
-            if topic == "batteryInfo":
-                self._status["battery"] = payload
-                if isinstance(payload, dict):
-                    self._status["battery_level"] = payload.get(
-                        "level", payload.get("battery_level"))
-            elif topic == "runningStatus":
-                self._status["running_status"] = payload
-                sc = payload.get("state", payload.get("robot_state"))
-                if sc is not None:
-                    self._status["state_code"] = sc
-                    self._status["state"] = self._decode_state(sc)
-            elif topic == "electricInfo":
-                self._status["electric_info"] = payload
-            elif topic == "rtkMSG":
-                self._status["rtk_status"] = payload
-            elif topic == "motorInfo":
-                self._status["motor_info"] = payload
-            elif topic == "stateInfo":
-                if isinstance(payload, dict):
-                    self._status.update(payload)
-            elif topic == "bodyInfoMSG":
-                self._status["body_info"] = payload
-            elif topic == "hubInfoMsg":
-                self._status["hub_info"] = payload
-            elif topic == "ultrasonicMsg":
-                self._status["ultrasonic"] = payload
-            elif topic == "velocityShow":
-                self._status["velocity"] = payload
-            elif topic == "netStatusInfo":
-                self._status["net_status"] = payload
-            elif topic == "visionInfo":
-                self._status["vision_info"] = payload
-            elif topic == "mowerHeadInfo":
-                self._status["mower_head_info"] = payload
-            elif topic == "ledInfoMsg":
-                self._status["led_info"] = payload
-            elif topic == "odomInfo":
-                self._status["odom_info"] = payload
-            elif topic == "SystemInfoFeedback":
-                self._status["system_info"] = payload
-            elif topic == "get_connect_wifi_name":
-                # Robot reports its own WiFi connection info.
-                # Note: the robot's WiFi IP (e.g. .105) differs from the
-                # data center/broker IP (e.g. .102) — this is expected.
-                # The broker runs on the data center (docking station),
-                # connected via ethernet. The robot connects over WiFi.
-                wifi_ip = payload.get("ip", "") if isinstance(payload, dict) else ""
-                self._status["wifi_info"] = payload
-                if wifi_ip:
-                    self._status["robot_wifi_ip"] = wifi_ip
-                    log.info("Robot WiFi: IP=%s, SSID='%s', signal=%s "
-                             "(data center/broker at %s)",
-                             wifi_ip,
-                             payload.get("name", "?"),
-                             payload.get("signal", "?"),
-                             self.robot_ip)
-
-            # ── command responses ──
-            elif topic == "get_map":
-                # Robot sometimes double-encodes the map as a JSON string
-                if isinstance(payload, str):
-                    try:
-                        payload = json.loads(payload)
-                    except (json.JSONDecodeError, ValueError):
-                        pass
-                self._live_map = payload
-            elif topic == "read_all_plan":
-                self._live_plans = payload
-            elif topic == "read_gps_ref":
-                self._live_gps_ref = payload
-            elif topic == "read_schedules":
-                self._live_schedules = payload
-            elif topic == "read_global_params":
-                self._live_global_params = payload
-            elif topic == "get_device_msg":
-                self._device_msg = payload
-                # ── breadcrumb trail: record odom while plan is active ──
-                if isinstance(payload, dict):
-                    state_msg = payload.get("StateMSG", {})
-                    is_planning = bool(state_msg.get("on_going_planning", 0))
-                    if is_planning and not self._trail_active:
-                        self._trail_active = True
-                        self._trail.clear()
-                        log.info("Breadcrumb trail started (plan active)")
-                    elif not is_planning and self._trail_active:
-                        self._trail_active = False
-                        log.info("Breadcrumb trail stopped (%d points)", len(self._trail))
-                    if self._trail_active:
-                        odom = payload.get("CombinedOdom", {})
-                        if odom.get("x") is not None and odom.get("y") is not None:
-                            self._trail.append({
-                                "x": odom["x"],
-                                "y": odom["y"],
-                                "ts": odom.get("timestamp", time.time()),
-                            })
-                            if len(self._trail) > self._max_trail_points:
-                                self._trail = self._trail[-self._max_trail_points:]
-            elif topic == "preview_plan_path":
-                self._preview_plan_path = payload
-                log.info("Received preview_plan_path (%s)",
-                         "error" if payload.get("state", 0) < 0 else "%d pts" % len(payload.get("data", payload.get("path", []))))
+            self._status["last_data_feedback"] = iso_now()
+            if handler is not None:
+                handler(payload)
             else:
                 self._status[topic] = payload
+            self._publish_status()
 
         # Signal waiting callers
-        if req_id and req_id in self._response_events:
-            self._command_responses[req_id] = data
-            self._response_events[req_id].set()
+        if req_id:
+            self._deliver_response(req_id, data)
+
+    def _on_battery_info(self, payload):
+        self._status["battery"] = payload
+        if isinstance(payload, dict):
+            self._status["battery_level"] = payload.get(
+                "level", payload.get("battery_level"))
+
+    def _on_running_status(self, payload):
+        self._status["running_status"] = payload
+        sc = payload.get("state", payload.get("robot_state"))
+        if sc is not None:
+            self._status["state_code"] = sc
+            self._status["state"] = self._decode_state(sc)
+
+    def _on_state_info(self, payload):
+        if isinstance(payload, dict):
+            self._status.update(payload)
+
+    def _on_wifi_name(self, payload):
+        # Robot reports its own WiFi connection info.
+        # Note: the robot's WiFi IP (e.g. .105) differs from the
+        # data center/broker IP (e.g. .102) — this is expected.
+        # The broker runs on the data center (docking station),
+        # connected via ethernet. The robot connects over WiFi.
+        wifi_ip = payload.get("ip", "") if isinstance(payload, dict) else ""
+        self._status["wifi_info"] = payload
+        if wifi_ip:
+            self._status["robot_wifi_ip"] = wifi_ip
+            log.info("Robot WiFi: IP=%s, SSID='%s', signal=%s "
+                     "(data center/broker at %s)",
+                     wifi_ip,
+                     payload.get("name", "?"),
+                     payload.get("signal", "?"),
+                     self.robot_ip)
+
+    def _on_live_map(self, payload):
+        # Robot sometimes double-encodes the map as a JSON string
+        if isinstance(payload, str):
+            try:
+                payload = json.loads(payload)
+            except (json.JSONDecodeError, ValueError):
+                pass
+        self._live_map = payload
+        self._map_version += 1
+
+    def _on_device_msg(self, payload):
+        self._device_msg = payload
+        self._device_msg_version += 1
+        # ── breadcrumb trail: record odom while plan is active ──
+        if isinstance(payload, dict):
+            state_msg = payload.get("StateMSG", {})
+            is_planning = bool(state_msg.get("on_going_planning", 0))
+            if is_planning and not self._trail_active:
+                self._trail_active = True
+                self._trail.clear()
+                log.info("Breadcrumb trail started (plan active)")
+            elif not is_planning and self._trail_active:
+                self._trail_active = False
+                log.info("Breadcrumb trail stopped (%d points)", len(self._trail))
+            if self._trail_active:
+                odom = payload.get("CombinedOdom", {})
+                if odom.get("x") is not None and odom.get("y") is not None:
+                    self._trail.append({
+                        "x": odom["x"],
+                        "y": odom["y"],
+                        "ts": odom.get("timestamp", time.time()),
+                    })
+                    if len(self._trail) > self._max_trail_points:
+                        self._trail = self._trail[-self._max_trail_points:]
+
+    def _on_preview_plan_path(self, payload):
+        self._preview_plan_path = payload
+        log.info("Received preview_plan_path (%s)",
+                 "error" if payload.get("state", 0) < 0 else "%d pts" % len(payload.get("data", payload.get("path", []))))
 
     def _handle_command_reply(self, data: dict):
         req_id = data.get("req_id")
-        if req_id and req_id in self._response_events:
+        if req_id:
+            self._deliver_response(req_id, data)
+
+    def _deliver_response(self, req_id: str, data: dict):
+        """Hand *data* to the send_command() / request() call waiting on *req_id*.
+
+        The first response wins; a later reply/data_feedback duplicate for
+        the same request is dropped, as is any reply arriving after the
+        caller gave up (its event is gone), so nothing is left behind.
+        """
+        with self._resp_lock:
+            event = self._response_events.get(req_id)
+            if event is None or req_id in self._command_responses:
+                return
             self._command_responses[req_id] = data
-            self._response_events[req_id].set()
+            event.set()
 
     def _track_control_command(self, topic: str, data: dict):
         """Track control commands (cmd_vel, cmd_roller, set_working_state, etc) for HA display."""
-        # Only track control commands (from app/* topics that are NOT data requests)
-        control_topics = [
-            "cmd_vel",          # Joystick movement
-            "cmd_roller",       # Roller/auger control
-            "set_working_state", # Start/stop/pause/dock
-            "set_plan_roller",  # Enable roller for plans
-            "start_plan",       # Start plan execution
-            "stop",             # Emergency stop
-            "pause",            # Pause operation
-            "resume",           # Resume operation
-            "dock",             # Return to dock
-            "preview_plan_path", # Plan preview
-        ]
-        
         # Check if this is a control command
-        is_control = any(ct in topic for ct in control_topics)
+        is_control = any(ct in topic for ct in _CONTROL_TOPICS)
         if not is_control:
             return
         
@@ -547,12 +760,15 @@ class YarboMQTTClient:
     # ── initial state request ────────────────────────────────────────────
 
     def _request_initial_state(self):
-        """Ask the robot for a full state dump right after connecting."""
-        for cmd in ["get_device_msg", "get_map", "read_all_plan",
-                     "read_gps_ref", "read_global_params", "read_schedules"]:
+        """Ask the robot for a full state dump right after connecting.
+
+        Sent back-to-back: this runs on paho's network thread, and replies
+        are routed by topic, so there is nothing to wait for between them.
+        """
+        for cmd in ("get_device_msg", "get_map", "read_all_plan",
+                    "read_gps_ref", "read_global_params", "read_schedules"):
             try:
                 self.send_command(cmd, {}, wait=False)
-                time.sleep(0.15)
             except Exception as e:
                 log.warning("Initial %s request failed: %s", cmd, e)
 
@@ -605,30 +821,105 @@ class YarboMQTTClient:
         if payload is None:
             payload = {}
 
-        topic = f"snowbot/{self.serial}/app/{command}"
-
         req_id = None
+        event = None
+        response = None
         if wait:
-            req_id = uuid.uuid4().hex[:12]
+            req_id = secrets.token_hex(6)
             payload["req_id"] = req_id
-            self._response_events[req_id] = threading.Event()
+            with self._resp_lock:
+                event = self._event_pool.pop() if self._event_pool else threading.Event()
+                self._response_events[req_id] = event
+
+        try:
+            self._publish(command, payload)
+            if event is not None:
+                event.wait(timeout=timeout)
+        finally:
+            # Always deregister, even on timeout or publish failure
+            if event is not None:
+                with self._resp_lock:
+                    self._response_events.pop(req_id, None)
+                    response = self._command_responses.pop(req_id, None)
+                    event.clear()
+                    self._event_pool.append(event)
+        return response
+
+    async def request(self, command: str, payload: dict = None,
+                      timeout: float = 5.0) -> Optional[dict]:
+        """Awaitable ``send_command(..., wait=True)``.
+
+        The calling coroutine is suspended on a future until the response
+        arrives or *timeout* passes, instead of parking a worker thread.
+        Returns the response data dict, or None on timeout.
+
+        Concurrent calls with the same command and payload share one round
+        trip (and the first caller's *timeout*), so simultaneous polls do
+        not each publish to the robot. Use it for reads only.
+        """
+        if not self._client or not self._connected:
+            raise ConnectionError("Not connected to robot MQTT")
+
+        payload = dict(payload) if payload else {}
+        key = (command, json.dumps(payload, sort_keys=True))
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._request(command, payload, timeout))
+            self._inflight[key] = task
+            task.add_done_callback(partial(self._inflight_done, key))
+        # A cancelled caller must not cancel the round trip others await
+        return await asyncio.shield(task)
+
+    def _inflight_done(self, key: tuple, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    async def _request(self, command: str, payload: dict, timeout: float) -> Optional[dict]:
+        req_id = secrets.token_hex(6)
+        payload["req_id"] = req_id
+        waiter = _FutureWaiter(asyncio.get_running_loop())
+        with self._resp_lock:
+            self._response_events[req_id] = waiter
+
+        try:
+            self._publish(command, payload)
+            try:
+                await asyncio.wait_for(waiter.future, timeout)
+            except asyncio.TimeoutError:
+                pass
+        finally:
+            with self._resp_lock:
+                self._response_events.pop(req_id, None)
+                response = self._command_responses.pop(req_id, None)
+        return response
 
-        raw = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    async def read_bundle(self, keys: tuple = tuple(_BUNDLE_READS),
+                          timeout: float = 5.0) -> dict:
+        """Re-read several live values (see ``_BUNDLE_READS``) at once.
+
+        The commands are published back-to-back and awaited together, so
+        the bundle costs one *timeout* budget rather than one per read.
+        Returns key → response data (None for reads that timed out).
+        """
+        replies = await asyncio.gather(*(
+            self.request(*_BUNDLE_READS[key], timeout)
+            for key in keys
+        ))
+        return dict(zip(keys, replies))
+
+    def _publish(self, command: str, payload: dict):
+        topic = self._app_prefix + command
+        if orjson:
+            raw = orjson.dumps(payload)
+        else:
+            raw = json.dumps(payload, ensure_ascii=False).encode("utf-8")
         result = self._client.publish(topic, raw, qos=0)
         if result.rc != 0:
-            if req_id:
-                self._response_events.pop(req_id, None)
             raise RuntimeError("MQTT publish failed: rc=%d" % result.rc)
 
         log.info("Sent command: %s → %s", command, topic)
         self._log_mqtt_tx(topic, payload, len(raw))
 
-        if wait and req_id:
-            self._response_events[req_id].wait(timeout=timeout)
-            self._response_events.pop(req_id, None)
-            return self._command_responses.pop(req_id, None)
-        return None
-
     # ── backward-compatible helpers (used by endpoints) ──────────────────
 
     def update(self, topic: str, payload: dict):
@@ -636,7 +927,7 @@ class YarboMQTTClient:
         with self._lock:
             if topic == "heart_beat":
                 self._status["connected"] = True
-                self._status["last_heartbeat"] = datetime.now(timezone.utc).isoformat()
+                self._status["last_heartbeat"] = iso_now()
             elif topic == "batteryInfo":
                 self._status["battery"] = payload
             elif topic == "runningStatus":
@@ -644,24 +935,31 @@ class YarboMQTTClient:
                 sc = payload.get("state", payload.get("robot_state"))
                 if sc is not None:
                     self._status["state"] = self._decode_state(sc)
-            elif topic == "electricInfo":
-                self._status["electric_info"] = payload
-            elif topic == "rtkMSG":
-                self._status["rtk_status"] = payload
-            elif topic == "motorInfo":
-                self._status["motor_info"] = payload
             else:
                 self._status[topic] = payload
+            self._publish_status()
+            self._state_version += 1
 
-    def get(self) -> dict:
-        """Return current status dict (backward compat)."""
-        with self._lock:
-            return dict(self._status)
+    def _publish_status(self):
+        """Swap in a read-only copy of ``_status`` for get(). Call with _lock held."""
+        self._status_view = MappingProxyType(dict(self._status))
+
+    def get(self) -> MappingProxyType:
+        """Return the current status (read-only snapshot, no locking).
+
+        Copy it (``dict(mc.get())``) before adding keys.
+        """
+        return self._status_view
 
     @property
     def is_connected(self) -> bool:
         return self._connected
 
+    @property
+    def map_version(self) -> int:
+        """Counter that changes whenever a new live map is received."""
+        return self._map_version
+
     @property
     def live_plans(self):
         return self._live_plans
@@ -682,6 +980,16 @@ class YarboMQTTClient:
     def device_msg(self):
         return self._device_msg
 
+    @property
+    def device_msg_version(self) -> int:
+        """Counter that changes whenever device_msg is replaced or updated."""
+        return self._device_msg_version
+
+    @property
+    def state_version(self) -> int:
+        """Counter that changes whenever status, device_msg, trail or commands may have."""
+        return self._state_version
+
     @property
     def control_commands(self):
         """Return list of recent control commands."""
@@ -704,14 +1012,11 @@ class YarboMQTTClient:
         """Clear the breadcrumb trail."""
         with self._lock:
             self._trail.clear()
+            self._state_version += 1
 
     @staticmethod
     def _decode_state(code) -> str:
-        states = {
-            0: "idle", 1: "working", 2: "paused", 3: "charging",
-            4: "error", 5: "docking", 6: "returning",
-        }
-        return states.get(code, "unknown_%s" % code)
+        return _DECODED_STATES.get(code, "unknown_%s" % code)
 
 
 def init_mqtt_client(api) -> 'YarboMQTTClient':
@@ -0,0 +1,1106 @@
+"""
+HTML views for the Yarbo Bridge.
+
+Page renderers are plain module-level functions so they can be called (and
+profiled) independently of the FastAPI route that serves them.
+"""
+
+import json
+from collections import OrderedDict
+from datetime import datetime
+from itertools import chain, cycle
+from types import MappingProxyType
+from typing import Iterator
+
+from bridge.map_utils import build_raster_overlay_js, join_bounds_json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Fill colours cycled over areas / plans on the Leaflet maps
+AREA_COLORS = ("#4fc3f7", "#81c784", "#ffb74d", "#ba68c8", "#ef5350", "#26c6da")
+
+# Charger enabled flag → (popup label, marker colour), indexed by bool
+_CHARGER_STYLE = (("Inactive", "gray"), ("Active", "green"))
+
+# Leaflet JS per map feature, filled with one %-format each. Popup arguments
+# are passed already quoted ("..." or `...`) and escaped by the caller.
+_AREA_JS = 'L.polygon(%s, {color:"%s",weight:2,fillOpacity:%s}).addTo(areasLayer).bindPopup(%s);'
+_PATHWAY_JS = 'L.polyline(%s, {color:"#ffd54f",weight:3,dashArray:"8,4"}).addTo(pathwaysLayer).bindPopup("%s");'
+_NOGO_JS = 'L.polygon(%s, {color:"%s",weight:2,fillOpacity:0.3}).addTo(nogoLayer).bindPopup("%s");'
+_SNOW_JS = ('L.polygon(%s, {color:"#90caf9",weight:1.5,dashArray:"6,3",fillOpacity:0.15})'
+            '.addTo(snowLayer).bindPopup("Snow Pile Zone");')
+_SIDEWALK_JS = 'L.polyline(%s, {color:"#b0bec5",weight:4,opacity:0.7}).addTo(sidewalksLayer).bindPopup(%s);'
+_FENCE_JS = 'L.polyline(%s, {color:"#ff9800",weight:2,dashArray:"4,4"}).addTo(fenceLayer).bindPopup("Electric Fence");'
+_CHARGER_JS = ('L.circleMarker([%s,%s], {radius:8,color:"%s",fillColor:"%s",fillOpacity:0.8})'
+               '.addTo(chargersLayer).bindPopup("%s");')
+# Charging-station marker per enabled flag with colour and popup baked in;
+# only the coordinates are formatted per charger.
+_STATION_JS = tuple(
+    _CHARGER_JS % ("%s", "%s", color, color, "Charging Station (%s)" % label)
+    for label, color in _CHARGER_STYLE
+)
+_REF_MARKER_JS = ('L.marker([%s,%s], {icon:L.icon({iconUrl:"/api/datacenter.png",iconSize:[36,36],'
+                  'iconAnchor:[18,18],popupAnchor:[0,-18]})}).addTo(markersLayer).bindPopup("GPS Reference Point");')
+# Popup with a ▶ Start button: (name, extra html, plan id); _START_POPUP is
+# the same HTML as a JS template literal.
+_START_POPUP_HTML = ('<b>%s</b><br>%s<button onclick="startJob(%s)" '
+                     'style="margin-top:6px;padding:4px 12px;'
+                     'background:#4caf50;color:#fff;border:none;border-radius:4px;cursor:pointer">'
+                     '\u25b6 Start</button>')
+_START_POPUP = "`" + _START_POPUP_HTML + "`"
+
+# Backslash / quotes → escaped, for labels embedded in JS string literals
+_JS_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "'": "\\'"})
+
+
+def js_escape(s) -> str:
+    """Escape *s* for a single- or double-quoted JS string literal (one pass)."""
+    return str(s).translate(_JS_ESCAPES)
+
+
+# Static dashboard markup between the per-request slots, encoded once at import
+# so rendering only encodes the dynamic pieces.
+_DASHBOARD_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <title>Yarbo Dashboard</title>
+  <link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css" />
+  <link rel="preconnect" href="https://fonts.googleapis.com">
+  <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+  <link href="https://fonts.googleapis.com/css2?family=Roboto:wght@400;500&display=swap" rel="stylesheet" media="print" onload="this.media='all'">
+  <style>
+    :root {
+      --primary-color: #03a9f4;
+      --accent-color: #ff9800;
+      --background: #f0f0f5;
+      --card-bg: #ffffff;
+      --primary-text: #212121;
+      --secondary-text: #727272;
+      --divider: rgba(0,0,0,.06);
+      --card-radius: 12px;
+      --card-shadow: 0 1px 3px 0 rgba(0,0,0,.1), 0 1px 2px -1px rgba(0,0,0,.1);
+      --green: #4caf50;
+      --red: #f44336;
+      --orange: #ff9800;
+      --blue: #2196f3;
+      --purple: #9c27b0;
+      --teal: #009688;
+      --sidebar-width: 320px;
+    }
+    @media (prefers-color-scheme: dark) {
+      :root {
+        --background: #1b1b1f;
+        --card-bg: #2c2c30;
+        --primary-text: #e3e3e8;
+        --secondary-text: #9e9ea6;
+        --divider: rgba(255,255,255,.08);
+        --card-shadow: 0 1px 4px 0 rgba(0,0,0,.4);
+      }
+    }
+    * { margin:0; padding:0; box-sizing:border-box; }
+    body {
+      font-family: Roboto, -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif;
+      background: var(--background); color: var(--primary-text);
+      display: flex; height: 100vh; overflow: hidden;
+    }
+
+    /* ── Sidebar ── */
+    .sidebar {
+      width: var(--sidebar-width); min-width: var(--sidebar-width);
+      background: var(--background); display: flex; flex-direction: column;
+      overflow-y: auto; padding: 12px; gap: 12px;
+    }
+    .sidebar::-webkit-scrollbar { width: 6px; }
+    .sidebar::-webkit-scrollbar-thumb { background: rgba(128,128,128,.3); border-radius: 3px; }
+
+    /* ── HA-style Card ── */
+    .ha-card {
+      background: var(--card-bg); border-radius: var(--card-radius);
+      box-shadow: var(--card-shadow); overflow: visible; flex-shrink: 0;
+    }
+    .ha-card-header {
+      padding: 16px 16px 0; font-size: 16px; font-weight: 500;
+      color: var(--primary-text); display: flex; align-items: center; gap: 8px;
+    }
+    .ha-card-header .header-icon {
+      width: 24px; height: 24px; color: var(--secondary-text);
+    }
+    .ha-card-content { padding: 12px 0 4px; }
+
+    /* ── Entity Row ── */
+    .entity-row {
+      display: flex; align-items: center; padding: 8px 16px; gap: 12px;
+      min-height: 48px; transition: background .15s;
+    }
+    .entity-row:not(:last-child) { border-bottom: 1px solid var(--divider); }
+    .entity-row:hover { background: rgba(128,128,128,.06); }
+    .entity-dot {
+      width: 10px; height: 10px; border-radius: 50%; flex-shrink: 0;
+    }
+    .entity-info { flex: 1; min-width: 0; }
+    .entity-name {
+      font-size: 14px; font-weight: 400; color: var(--primary-text);
+      white-space: nowrap; overflow: hidden; text-overflow: ellipsis;
+    }
+    .entity-secondary {
+      font-size: 12px; color: var(--secondary-text); margin-top: 1px;
+    }
+    .entity-state {
+      font-size: 14px; color: var(--primary-text); white-space: nowrap;
+      font-weight: 400;
+    }
+    .entity-state.active { color: var(--green); }
+    .entity-state.warning { color: var(--orange); }
+    .entity-state.error { color: var(--red); }
+
+    /* ── Play Button ── */
+    .play-btn {
+      width: 36px; height: 36px; border-radius: 50%; border: none;
+      background: rgba(76,175,80,.12); color: var(--green); cursor: pointer;
+      display: flex; align-items: center; justify-content: center;
+      transition: all .2s; flex-shrink: 0;
+    }
+    .play-btn:hover { background: rgba(76,175,80,.25); transform: scale(1.08); }
+    .preview-btn {
+      width: 32px; height: 32px; border-radius: 50%; border: none;
+      background: rgba(255,152,0,.1); color: var(--orange); cursor: pointer;
+      display: flex; align-items: center; justify-content: center;
+      transition: all .2s; flex-shrink: 0;
+    }
+    .preview-btn:hover { background: rgba(255,152,0,.25); transform: scale(1.08); }
+    .refresh-btn {
+      width: 28px; height: 28px; border-radius: 50%; border: none;
+      background: transparent; color: var(--secondary-text); cursor: pointer;
+      display: flex; align-items: center; justify-content: center;
+      transition: all .25s; margin-left: auto; flex-shrink: 0;
+    }
+    .refresh-btn:hover { background: rgba(128,128,128,.12); color: var(--primary-text); }
+    .refresh-btn.spinning svg { animation: spin .8s linear infinite; }
+    @keyframes spin { to { transform: rotate(360deg); } }
+
+    /* ── Tile Buttons ── */
+    .tile-grid {
+      display: grid; grid-template-columns: 1fr 1fr 1fr; gap: 8px;
+      padding: 12px 16px 16px;
+    }
+    .tile-btn {
+      display: flex; flex-direction: column; align-items: center;
+      justify-content: center; gap: 6px; padding: 14px 4px;
+      border-radius: 12px; border: none; cursor: pointer;
+      font-size: 12px; font-weight: 500; font-family: inherit;
+      transition: all .2s; min-height: 64px;
+    }
+    .tile-btn svg { width: 24px; height: 24px; }
+    .tile-btn:hover { filter: brightness(1.1); transform: translateY(-1px); }
+    .tile-btn:active { transform: scale(.97); }
+    .tile-stop {
+      background: rgba(244,67,54,.1); color: var(--red);
+      grid-column: 1 / -1; flex-direction: row; gap: 8px; padding: 12px;
+    }
+    .tile-pause { background: rgba(255,152,0,.1); color: var(--orange); }
+    .tile-resume { background: rgba(33,150,243,.1); color: var(--blue); }
+    .tile-dock { background: rgba(156,39,176,.1); color: var(--purple); }
+    .tile-undock { background: rgba(0,150,136,.1); color: var(--teal); }
+    .tile-trail { background: rgba(0,229,255,.1); color: #00e5ff; }
+    .tile-preview { background: rgba(255,152,0,.1); color: var(--orange); }
+
+    /* ── Status Card ── */
+    .status-icon {
+      width: 36px; height: 36px; border-radius: 50%;
+      display: flex; align-items: center; justify-content: center;
+      flex-shrink: 0;
+    }
+    .status-icon svg { width: 20px; height: 20px; }
+    .status-icon.robot { background: rgba(3,169,244,.1); color: var(--primary-color); }
+    .status-icon.battery { background: rgba(76,175,80,.1); color: var(--green); }
+    .status-icon.calendar { background: rgba(255,152,0,.1); color: var(--orange); }
+    .status-icon.mqtt { background: rgba(0,150,136,.1); color: var(--teal); }
+    .status-icon.map { background: rgba(156,39,176,.1); color: var(--purple); }
+
+    /* ── Toast ── */
+    .toast {
+      position: fixed; bottom: 20px; left: 50%; transform: translateX(-50%);
+      background: var(--card-bg); color: var(--primary-text);
+      padding: 12px 24px; border-radius: 12px; font-size: 14px;
+      z-index: 9999; display: none;
+      box-shadow: 0 4px 16px rgba(0,0,0,.2); border: 1px solid var(--divider);
+    }
+    .toast.error { background: var(--red); color: #fff; border: none; }
+    .toast.success { background: var(--green); color: #fff; border: none; }
+
+    /* ── Map ── */
+    #map { flex: 1; border-radius: 0; }
+
+    @media (max-width: 700px) {
+      body { flex-direction: column; }
+      .sidebar { width: 100%; min-width: unset; max-height: 40vh; flex-direction: column; }
+      #map { height: 60vh; }
+    }
+  </style>
+</head>
+<body>
+  <div class="sidebar">
+    <!-- ── Header Card ── -->
+    <div class="ha-card">
+      <div class="ha-card-header">
+        <img class="header-icon" src="/api/favicon.png" style="width:24px;height:24px;object-fit:contain;">
+        <span>Yarbo</span>
+      </div>
+      <div class="ha-card-content" style="padding: 8px 16px 12px;">
+        <span class="entity-secondary" id="header-summary">\u2014</span>
+      </div>
+    </div>
+
+    <!-- ── Plans Card ── -->
+    <div class="ha-card">
+      <div class="ha-card-header">
+        <svg class="header-icon" viewBox="0 0 24 24"><path d="M19 3H5c-1.1 0-2 .9-2 2v14c0 1.1.9 2 2 2h14c1.1 0 2-.9 2-2V5c0-1.1-.9-2-2-2zm-2 10H7v-2h10v2z" fill="currentColor"/></svg>
+        Plans
+        <button class="refresh-btn" id="refreshPlansBtn" onclick="refreshPlans()" title="Refresh plans">
+          <svg width="16" height="16" viewBox="0 0 24 24"><path d="M17.65 6.35A7.958 7.958 0 0012 4c-4.42 0-7.99 3.58-7.99 8s3.57 8 7.99 8c3.73 0 6.84-2.55 7.73-6h-2.08A5.99 5.99 0 0112 18c-3.31 0-6-2.69-6-6s2.69-6 6-6c1.66 0 3.14.69 4.22 1.78L13 11h7V4l-2.35 2.35z" fill="currentColor"/></svg>
+        </button>
+      </div>
+      <div class="ha-card-content" id="plansList">
+        """.encode()
+_DASHBOARD_AFTER_PLANS = """
+      </div>
+    </div>
+
+    <!-- ── Controls Card ── -->
+    <div class="ha-card">
+      <div class="tile-grid">
+        <button class="tile-btn tile-stop" onclick="robotCmd('stop')">
+          <svg viewBox="0 0 24 24"><path d="M6 6h12v12H6z" fill="currentColor"/></svg>
+          Emergency Stop
+        </button>
+        <button class="tile-btn tile-pause" onclick="robotCmd('pause')">
+          <svg viewBox="0 0 24 24"><path d="M6 19h4V5H6v14zm8-14v14h4V5h-4z" fill="currentColor"/></svg>
+          Pause
+        </button>
+        <button class="tile-btn tile-resume" onclick="robotCmd('resume')">
+          <svg viewBox="0 0 24 24"><path d="M8 5v14l11-7z" fill="currentColor"/></svg>
+          Resume
+        </button>
+        <button class="tile-btn tile-dock" onclick="robotCmd('dock')">
+          <svg viewBox="0 0 24 24"><path d="M10 20v-6h4v6h5v-8h3L12 3 2 12h3v8z" fill="currentColor"/></svg>
+          Dock
+        </button>
+        <button class="tile-btn tile-undock" onclick="robotCmd('undock')">
+          <svg viewBox="0 0 24 24"><path d="M9 5v2h6.59L4 18.59 5.41 20 17 8.41V15h2V5z" fill="currentColor"/></svg>
+          Undock
+        </button>
+        <button class="tile-btn tile-trail" onclick="clearTrail()">
+          <svg viewBox="0 0 24 24"><path d="M12 2C8.13 2 5 5.13 5 9c0 5.25 7 13 7 13s7-7.75 7-13c0-3.87-3.13-7-7-7zm0 9.5a2.5 2.5 0 010-5 2.5 2.5 0 010 5z" fill="currentColor"/></svg>
+          Clear Trail
+        </button>
+        <button class="tile-btn tile-preview" onclick="clearPreview()">
+          <svg viewBox="0 0 24 24"><path d="M19 6.41L17.59 5 12 10.59 6.41 5 5 6.41 10.59 12 5 17.59 6.41 19 12 13.41 17.59 19 19 17.59 13.41 12z" fill="currentColor"/></svg>
+          Clear Path
+        </button>
+      </div>
+    </div>
+
+    <!-- ── Status Card ── -->
+    <div class="ha-card" style="margin-top:auto;">
+      <div class="ha-card-header">
+        <svg class="header-icon" viewBox="0 0 24 24"><path d="M11 17h2v-6h-2v6zm1-15C6.48 2 2 6.48 2 12s4.48 10 10 10 10-4.48 10-10S17.52 2 12 2zm0 18c-4.41 0-8-3.59-8-8s3.59-8 8-8 8 3.59 8 8-3.59 8-8 8zM11 9h2V7h-2v2z" fill="currentColor"/></svg>
+        Status
+      </div>
+      <div class="ha-card-content">
+        <div class="entity-row">
+          <div class="status-icon robot">
+            <img src="/api/favicon.png" style="width:20px;height:20px;object-fit:contain;">
+          </div>
+          <div class="entity-info"><span class="entity-name">Robot</span></div>
+          <span class="entity-state" id="st-robot">\u2014</span>
+        </div>
+        <div class="entity-row">
+          <div class="status-icon battery">
+            <svg viewBox="0 0 24 24"><path d="M15.67 4H14V2h-4v2H8.33C7.6 4 7 4.6 7 5.33v15.34C7 21.4 7.6 22 8.33 22h7.33c.74 0 1.34-.6 1.34-1.33V5.33C17 4.6 16.4 4 15.67 4z" fill="currentColor"/></svg>
+          </div>
+          <div class="entity-info"><span class="entity-name">Battery</span></div>
+          <span class="entity-state" id="st-battery">\u2014</span>
+        </div>
+        <div class="entity-row">
+          <div class="status-icon calendar">
+            <svg viewBox="0 0 24 24"><path d="M19 3h-1V1h-2v2H8V1H6v2H5c-1.11 0-2 .9-2 2v14a2 2 0 002 2h14a2 2 0 002-2V5a2 2 0 00-2-2zm0 16H5V8h14v11z" fill="currentColor"/></svg>
+          </div>
+          <div class="entity-info"><span class="entity-name">Calendar</span></div>
+          <span class="entity-state" id="st-calendar">\u2014</span>
+        </div>
+        <div class="entity-row">
+          <div class="status-icon mqtt">
+            <svg viewBox="0 0 24 24"><path d="M12 2C6.48 2 2 6.48 2 12s4.48 10 10 10 10-4.48 10-10S17.52 2 12 2zm-1 17.93c-3.95-.49-7-3.85-7-7.93 0-.62.08-1.21.21-1.79L9 15v1c0 1.1.9 2 2 2v1.93zm6.9-2.54c-.26-.81-1-1.39-1.9-1.39h-1v-3c0-.55-.45-1-1-1H8v-2h2c.55 0 1-.45 1-1V7h2c1.1 0 2-.9 2-2v-.41c2.93 1.19 5 4.06 5 7.41 0 2.08-.8 3.97-2.1 5.39z" fill="currentColor"/></svg>
+          </div>
+          <div class="entity-info"><span class="entity-name">MQTT</span></div>
+          <span class="entity-state" id="st-mqtt">\u2014</span>
+        </div>
+        <div class="entity-row">
+          <div class="status-icon map">
+            <svg viewBox="0 0 24 24"><path d="M20.5 3l-.16.03L15 5.1 9 3 3.36 4.9c-.21.07-.36.25-.36.48V20.5a.5.5 0 00.5.5l.16-.03L9 18.9l6 2.1 5.64-1.9c.21-.07.36-.25.36-.48V3.5a.5.5 0 00-.5-.5zM15 19l-6-2.11V5l6 2.11V19z" fill="currentColor"/></svg>
+          </div>
+          <div class="entity-info"><span class="entity-name">Map Source</span></div>
+          <span class="entity-state active">""".encode()
+_DASHBOARD_AFTER_SOURCE = """</span>
+        </div>
+      </div>
+    </div>
+  </div>
+
+  <div id="map"></div>
+  <div class="toast" id="toast"></div>
+
+  <script id="mapdata" type="application/json">""".encode()
+_DASHBOARD_AFTER_DATA = """</script>
+  <script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+  <script>
+    var osmLayer = L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+      maxZoom: 22, attribution: '&copy; OpenStreetMap'
+    });
+    var esriSat = L.tileLayer('https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}', {
+      maxZoom: 22, attribution: '&copy; Esri'
+    });
+    // One canvas for every vector layer: a single paint per frame, and
+    // shapes outside the padded viewport are clipped rather than drawn
+    var map = L.map('map', { layers: [esriSat], renderer: L.canvas({ padding: 0.5 }) }).setView([""".encode()
+_DASHBOARD_AFTER_LAT = """, """.encode()
+_DASHBOARD_AFTER_LON = """], 17);
+    var areasLayer = L.layerGroup().addTo(map);
+    var pathwaysLayer = L.layerGroup().addTo(map);
+    var nogoLayer = L.layerGroup().addTo(map);
+    var snowLayer = L.layerGroup().addTo(map);
+    var sidewalksLayer = L.layerGroup().addTo(map);
+    var chargersLayer = L.layerGroup().addTo(map);
+    var markersLayer = L.layerGroup().addTo(map);
+    """.encode()
+_DASHBOARD_AFTER_RASTER = """
+    var mapData = JSON.parse(document.getElementById('mapdata').textContent);
+    mapData.areas.forEach(function(f) {
+      L.polygon(f[0], {color:f[1],weight:2,fillOpacity:0.25}).addTo(areasLayer).bindPopup(f[2]);
+    });
+    mapData.pathways.forEach(function(f) {
+      L.polyline(f[0], {color:"#ffd54f",weight:3,dashArray:"8,4"}).addTo(pathwaysLayer).bindPopup(f[1]);
+    });
+    mapData.nogo.forEach(function(p) {
+      L.polygon(p, {color:"#ef5350",weight:2,fillOpacity:0.3}).addTo(nogoLayer).bindPopup("No-Go Zone");
+    });
+    mapData.snow.forEach(function(p) {
+      L.polygon(p, {color:"#90caf9",weight:1.5,dashArray:"6,3",fillOpacity:0.15}).addTo(snowLayer).bindPopup("Snow Pile Zone");
+    });
+    mapData.sidewalks.forEach(function(f) {
+      L.polyline(f[0], {color:"#b0bec5",weight:4,opacity:0.7}).addTo(sidewalksLayer).bindPopup(f[1]);
+    });
+    mapData.chargers.forEach(function(c) {
+      L.circleMarker([c[0], c[1]], {radius:8,color:c[2],fillColor:c[2],fillOpacity:0.8}).addTo(chargersLayer).bindPopup(c[3]);
+    });
+    L.marker(mapData.ref, {icon:L.icon({iconUrl:"/api/datacenter.png",iconSize:[36,36],iconAnchor:[18,18],popupAnchor:[0,-18]})}).addTo(markersLayer).bindPopup("GPS Reference Point");
+    L.control.layers(
+      {"OpenStreetMap": osmLayer, "Satellite": esriSat},
+      {"Areas": areasLayer, "Pathways": pathwaysLayer, "No-Go": nogoLayer,
+       "Snow Piles": snowLayer, "Sidewalks": sidewalksLayer, "Chargers": chargersLayer, "Ref Point": markersLayer}
+    ).addTo(map);
+    var trailLine = L.polyline([], {color:'#00e5ff', weight:3, opacity:0.8, dashArray:'6,4'}).addTo(map);
+    var previewLine = L.polyline([], {color:'#ff9800', weight:2, opacity:0.7, dashArray:'4,6'}).addTo(map);
+    var allPoints = """.encode()
+_DASHBOARD_TAIL = """;
+    if (allPoints.length > 0) map.fitBounds(allPoints, {padding: [30,30]});
+    var robotMarker = null;
+    var yarboIcon = L.icon({
+      iconUrl: '/api/favicon.png',
+      iconSize: [32, 32],
+      iconAnchor: [16, 16],
+      popupAnchor: [0, -18]
+    });
+    function showToast(msg, type) {
+      var t = document.getElementById('toast');
+      t.textContent = msg; t.className = 'toast ' + (type || '');
+      t.style.display = 'block';
+      setTimeout(function(){ t.style.display = 'none'; }, 3500);
+    }
+    function apiPost(path) {
+      return fetch(path, {method:'POST'}).then(function(r){ return r.json(); });
+    }
+    function apiGet(path) { return fetch(path).then(function(r){ return r.json(); }); }
+    function startJob(areaId) {
+      showToast('Starting plan ' + areaId + '...', '');
+      apiPost('/api/robot/start_plan/' + areaId)
+        .then(function(d) {
+          if (d.ok) showToast('Plan ' + areaId + ' started', 'success');
+          else if (d.blocked) showToast('Blocked: ' + d.reason, 'error');
+          else showToast(JSON.stringify(d), 'error');
+        }).catch(function(e) { showToast('Error: ' + e.message, 'error'); });
+    }
+    function refreshPlans() {
+      var btn = document.getElementById('refreshPlansBtn');
+      btn.classList.add('spinning');
+      fetch('/api/live/plans?refresh=true')
+        .then(function(r) { return r.json(); })
+        .then(function(data) {
+          var plans = (data && data.data) ? data.data : [];
+          var colors = ['#4fc3f7','#81c784','#ffb74d','#ba68c8','#ef5350','#26c6da'];
+          var html = '';
+          if (plans.length === 0) {
+            html = '<div class="entity-row"><span class="entity-name" style="color:var(--secondary-text)">No plans available</span></div>';
+          } else {
+            plans.forEach(function(p) {
+              var pid = p.id || 0;
+              var pname = (p.name || 'Plan ' + pid).trim();
+              var pcolor = colors[(pid - 1) % colors.length];
+              var ac = (p.areaIds || []).length;
+              var al = ac + ' area' + (ac !== 1 ? 's' : '');
+              html += '<div class="entity-row">'
+                + '  <div class="entity-dot" style="background:' + pcolor + '"></div>'
+                + '  <div class="entity-info">'
+                + '    <span class="entity-name">' + pname + '</span>'
+                + '    <span class="entity-secondary">' + al + '</span>'
+                + '  </div>'
+                + '  <button class="preview-btn" onclick="previewPath(' + pid + ')" title="Preview path">'
+                + '    <svg width="16" height="16" viewBox="0 0 24 24"><path d="M12 2C8.13 2 5 5.13 5 9c0 5.25 7 13 7 13s7-7.75 7-13c0-3.87-3.13-7-7-7zm0 9.5a2.5 2.5 0 010-5 2.5 2.5 0 010 5z" fill="currentColor"/></svg>'
+                + '  </button>'
+                + '  <button class="play-btn" onclick="startJob(' + pid + ')" title="Start ' + pname + '">'
+                + '    <svg width="18" height="18" viewBox="0 0 24 24"><path d="M8 5v14l11-7z" fill="currentColor"/></svg>'
+                + '  </button>'
+                + '</div>';
+            });
+          }
+          document.getElementById('plansList').innerHTML = html;
+          showToast('Plans refreshed (' + plans.length + ')', 'success');
+        })
+        .catch(function(e) { showToast('Refresh failed: ' + e.message, 'error'); })
+        .finally(function() { btn.classList.remove('spinning'); });
+    }
+    function robotCmd(cmd) {
+      showToast('Sending ' + cmd + '...', '');
+      apiPost('/api/robot/' + cmd)
+        .then(function(d) {
+          if (d.ok) showToast(cmd.charAt(0).toUpperCase() + cmd.slice(1) + ' sent', 'success');
+          else showToast(JSON.stringify(d), 'error');
+        }).catch(function(e) { showToast('Error: ' + e.message, 'error'); });
+    }
+    // Last value written per element property; unchanged values skip the DOM
+    var domPrev = {};
+    function setProp(id, prop, val) {
+      var k = id + '.' + prop;
+      if (domPrev[k] === val) return;
+      domPrev[k] = val;
+      var el = document.getElementById(id);
+      if (el) el[prop] = val;
+    }
+    function renderTick(tick) {
+      var d = tick.status;
+      var state = d.state || d.status || 'Unknown';
+      var label = state.charAt(0).toUpperCase() + state.slice(1);
+      setProp('st-robot', 'textContent', label);
+      setProp('st-robot', 'className', 'entity-state' + (state === 'working' ? ' active' : state === 'error' ? ' error' : ''));
+      if (d.battery_percent !== undefined) {
+        setProp('st-battery', 'textContent', d.battery_percent + '%');
+        setProp('st-battery', 'className', 'entity-state' + (d.battery_percent < 20 ? ' error' : ' active'));
+      }
+      setProp('st-mqtt', 'textContent', d.mqtt_connected ? 'Connected' : 'Disconnected');
+      setProp('st-mqtt', 'className', 'entity-state' + (d.mqtt_connected ? ' active' : ' error'));
+      var parts = [];
+      if (state) parts.push(label);
+      if (d.battery_percent !== undefined) parts.push(d.battery_percent + '% battery');
+      setProp('header-summary', 'textContent', parts.join(' \u2022 '));
+      if (d.latitude && d.longitude) {
+        var pos = d.latitude + ',' + d.longitude;
+        if (!robotMarker) {
+          robotMarker = L.marker([d.latitude, d.longitude], {
+            icon: yarboIcon
+          }).addTo(map).bindPopup('Yarbo Robot');
+        } else if (domPrev.robotPos !== pos) { robotMarker.setLatLng([d.latitude, d.longitude]); }
+        domPrev.robotPos = pos;
+      }
+      // Show/hide trail status in header summary
+      if (d.on_going_planning) {
+        updateTrail();
+      }
+      var cal = tick.calendar;
+      if (cal.busy) {
+        setProp('st-calendar', 'textContent', cal.event_summary || 'Busy');
+        setProp('st-calendar', 'className', 'entity-state warning');
+      } else {
+        setProp('st-calendar', 'textContent', 'Free');
+        setProp('st-calendar', 'className', 'entity-state active');
+      }
+    }
+    function updateStatus() {
+      // Apply each poll's changes in one frame
+      apiGet('/api/dashboard/tick').then(function(tick) {
+        requestAnimationFrame(function() { renderTick(tick); });
+      }).catch(function() {
+        requestAnimationFrame(function() { setProp('st-calendar', 'textContent', '\u2014'); });
+      });
+    }
+    updateStatus();
+    setInterval(updateStatus, 10000);
+
+    function updateTrail() {
+      apiGet('/api/live/trail').then(function(d) {
+        if (d.points && d.points.length > 0) {
+          trailLine.setLatLngs(d.points);
+        }
+      }).catch(function(){});
+    }
+
+    function previewPath(planId) {
+      showToast('Requesting plan path...', '');
+      fetch('/api/live/preview_path?plan_id=' + planId, {method:'POST'})
+        .then(function(r) { return r.json(); })
+        .then(function(d) {
+          if (d.ok && d.points && d.points.length > 0) {
+            previewLine.setLatLngs(d.points);
+            showToast('Plan path: ' + d.count + ' points', 'success');
+          } else if (d.error) {
+            showToast('Preview failed: ' + d.error, 'error');
+          } else {
+            showToast('No path data returned', 'error');
+          }
+        })
+        .catch(function(e) { showToast('Error: ' + e.message, 'error'); });
+    }
+
+    function clearTrail() {
+      fetch('/api/live/trail/clear', {method:'POST'}).then(function() {
+        trailLine.setLatLngs([]);
+        showToast('Trail cleared', 'success');
+      }).catch(function(e) { showToast('Error: ' + e.message, 'error'); });
+    }
+
+    function clearPreview() {
+      previewLine.setLatLngs([]);
+      showToast('Preview path cleared', 'success');
+    }
+  </script>
+</body>
+</html>""".encode()
+
+
+# page → (geo, (feature JS, bounds JSON)). Geometry dicts are cached and
+# shared upstream, so the layer JS is rebuilt only when a new geo arrives.
+_map_js_cache: dict = {}
+
+
+def _cached_map_js(page: str, geo: dict, build) -> tuple:
+    """Encoded ``build(geo)`` for *page*, reused while *geo* is the same object."""
+    hit = _map_js_cache.get(page)
+    if hit is None or hit[0] is not geo:
+        hit = (geo, build(geo))
+        _map_js_cache[page] = hit
+    return hit[1]
+
+
+def _station_js(chargers: list) -> Iterator[str]:
+    """``Charging Station (Active|Inactive)`` markers (dashboard / property map)."""
+    for cp in chargers:
+        yield _STATION_JS[bool(cp["enabled"])] % (cp["lat"], cp["lon"])
+
+
+def _dashboard_map_js(geo: dict) -> tuple:
+    """Dashboard layer data (JSON, read by the page script) and fitBounds box.
+
+    One document replaces a Leaflet call per feature; ``</`` is escaped so
+    the JSON can sit inside a ``<script>`` element.
+    """
+    areas = [
+        (area["points"], color,
+         _START_POPUP_HTML % (area["name"], "%s m\u00b2<br>" % round(area["area_sqm"]),
+                              area.get("id", i + 1)))
+        for i, (area, color) in enumerate(zip(geo["areas"], cycle(AREA_COLORS)))
+    ]
+    sidewalks = [
+        (sw["points"], sw["name"] if sw.get("id") is None
+         else _START_POPUP_HTML % (sw["name"], "", sw["id"]))
+        for sw in geo.get("sidewalks", [])
+    ]
+    chargers = []
+    for cp in geo["chargers"]:
+        cp_label, cp_color = _CHARGER_STYLE[bool(cp["enabled"])]
+        chargers.append((cp["lat"], cp["lon"], cp_color, "Charging Station (%s)" % cp_label))
+    data = {
+        "areas": areas,
+        "pathways": [(pw["points"], pw["name"]) for pw in geo["pathways"]],
+        "nogo": [nz["points"] for nz in geo["nogo"]],
+        "snow": [sp["points"] for sp in geo.get("snow_piles", [])],
+        "sidewalks": sidewalks,
+        "chargers": chargers,
+        "ref": (geo["ref_lat"], geo["ref_lon"]),
+    }
+    data_json = orjson.dumps(data) if orjson else json.dumps(data, separators=(",", ":")).encode()
+    all_bounds_json = join_bounds_json(geo["areas"], geo.get("snow_piles", []), geo.get("sidewalks", []))
+    return data_json.replace(b"</", b"<\\/"), all_bounds_json.encode()
+
+
+# (plans, encoded sidebar rows) of the last plan list rendered; keyed by
+# identity like _dashboard_page, so a geometry rebuild reuses the sidebar.
+_plans_sidebar: tuple = (None, b"")
+
+
+def _plans_sidebar_html(plans: list) -> bytes:
+    """Encoded sidebar rows for *plans*, rebuilt only for a new plan list."""
+    global _plans_sidebar
+    hit = _plans_sidebar
+    if hit[0] is plans:
+        return hit[1]
+    plan_list_html = []
+    for p in plans:
+        pid = p.get("id", 0)
+        pname = p.get("name", f"Plan {pid}").strip()
+        pcolor = AREA_COLORS[(pid - 1) % len(AREA_COLORS)]
+        area_count = len(p.get("areaIds", []))
+        area_label = f"{area_count} area{'s' if area_count != 1 else ''}"
+        plan_list_html.append(
+            f'<div class="entity-row">'
+            f'  <div class="entity-dot" style="background:{pcolor}"></div>'
+            f'  <div class="entity-info">'
+            f'    <span class="entity-name">{pname}</span>'
+            f'    <span class="entity-secondary">{area_label}</span>'
+            f'  </div>'
+            f'  <button class="preview-btn" onclick="previewPath({pid})" title="Preview path">'
+            f'    <svg width="16" height="16" viewBox="0 0 24 24"><path d="M12 2C8.13 2 5 5.13 5 9c0 5.25 7 13 7 13s7-7.75 7-13c0-3.87-3.13-7-7-7zm0 9.5a2.5 2.5 0 010-5 2.5 2.5 0 010 5z" fill="currentColor"/></svg>'
+            f'  </button>'
+            f'  <button class="play-btn" onclick="startJob({pid})" title="Start {pname}">'
+            f'    <svg width="18" height="18" viewBox="0 0 24 24"><path d="M8 5v14l11-7z" fill="currentColor"/></svg>'
+            f'  </button>'
+            f'</div>'
+        )
+
+    areas_html = "\n".join(plan_list_html) if plan_list_html else '<div class="entity-row"><span class="entity-name" style="color:var(--secondary-text)">No plans available</span></div>'
+    _plans_sidebar = (plans, areas_html.encode())
+    return _plans_sidebar[1]
+
+
+def _dashboard_chunks(geo: dict, plans: list) -> tuple:
+    """Encoded dashboard page for *geo* and *plans*, as a tuple of chunks."""
+    map_data_json, all_bounds_json = _cached_map_js("dashboard", geo, _dashboard_map_js)
+
+    return (
+        _DASHBOARD_HEAD,
+        _plans_sidebar_html(plans),
+        _DASHBOARD_AFTER_PLANS,
+        str(geo.get("_source", "Unknown")).encode(),
+        _DASHBOARD_AFTER_SOURCE,
+        map_data_json,
+        _DASHBOARD_AFTER_DATA,
+        str(geo["ref_lat"]).encode(),
+        _DASHBOARD_AFTER_LAT,
+        str(geo["ref_lon"]).encode(),
+        _DASHBOARD_AFTER_LON,
+        build_raster_overlay_js(geo).encode(),
+        _DASHBOARD_AFTER_RASTER,
+        all_bounds_json,
+        _DASHBOARD_TAIL,
+    )
+
+
+# (geo, plans, chunks) of the last dashboard rendered. Both inputs are cached
+# upstream and replaced, not mutated, when they change.
+_dashboard_page: tuple = (None, None, ())
+
+
+def render_dashboard(geo: dict, plans: list) -> Iterator[bytes]:
+    """Render the dashboard page (plan sidebar + Leaflet map) for *geo*.
+
+    Yields UTF-8 chunks so the page can be streamed without building one
+    large string. The page is rebuilt only when *geo* or *plans* is a new
+    object; otherwise the previous chunks are replayed.
+    """
+    global _dashboard_page
+    page = _dashboard_page
+    if page[0] is not geo or page[1] is not plans:
+        page = (geo, plans, _dashboard_chunks(geo, plans))
+        _dashboard_page = page
+    yield from page[2]
+
+
+# Static markup of the standalone map pages, split at the per-request slots.
+_MQTT_MAP_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <title>Yarbo MQTT Map</title>
+  <link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css" />
+  <script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+  <style>
+    * { margin:0; padding:0; }
+    html, body, #map { width:100%; height:100%; }
+    .source-badge {
+      position: fixed; top: 10px; right: 60px; z-index: 1000;
+      background: rgba(0,0,0,0.7); color: #4fc3f7; padding: 6px 14px;
+      border-radius: 6px; font: 13px sans-serif;
+    }
+  </style>
+</head>
+<body>
+  <div id="map"></div>
+  <div class="source-badge">Source: """.encode()
+_MQTT_MAP_AFTER_SOURCE = """</div>
+  <script>
+    var osmLayer = L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+      maxZoom: 22, attribution: '&copy; OpenStreetMap'
+    });
+    var esriSat = L.tileLayer('https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}', {
+      maxZoom: 22, attribution: '&copy; Esri'
+    });
+    // One canvas for every vector layer: a single paint per frame, and
+    // shapes outside the padded viewport are clipped rather than drawn
+    var map = L.map('map', { layers: [osmLayer], renderer: L.canvas({ padding: 0.5 }) }).setView([""".encode()
+_MQTT_MAP_AFTER_LAT = """, """.encode()
+_MQTT_MAP_AFTER_LON = """], 17);
+    var areasLayer = L.layerGroup().addTo(map);
+    var pathwaysLayer = L.layerGroup().addTo(map);
+    var nogoLayer = L.layerGroup().addTo(map);
+    var snowLayer = L.layerGroup().addTo(map);
+    var chargersLayer = L.layerGroup().addTo(map);
+    var sidewalksLayer = L.layerGroup().addTo(map);
+    var fenceLayer = L.layerGroup().addTo(map);
+    var markersLayer = L.layerGroup().addTo(map);
+    """.encode()
+_MQTT_MAP_AFTER_MAP_JS = """
+    var baseLayers = { "OpenStreetMap": osmLayer, "Esri Satellite": esriSat };
+    var overlays = {
+      "Areas": areasLayer, "Pathways": pathwaysLayer, "No-Go Zones": nogoLayer,
+      "Snow Piles": snowLayer, "Chargers": chargersLayer, "Sidewalks": sidewalksLayer,
+      "Electric Fence": fenceLayer, "Reference Point": markersLayer
+    };
+    L.control.layers(baseLayers, overlays).addTo(map);
+    var allPoints = """.encode()
+_MQTT_MAP_TAIL = """;
+    if (allPoints.length > 0) { map.fitBounds(allPoints, {padding: [30,30]}); }
+    function showToast(msg, type) {
+      var t = document.getElementById('toast');
+      if (!t) { t = document.createElement('div'); t.id='toast'; t.style.cssText='position:fixed;bottom:20px;left:50%;transform:translateX(-50%);padding:10px 20px;border-radius:8px;color:#fff;font-size:14px;z-index:9999;display:none;'; document.body.appendChild(t); }
+      t.textContent = msg; t.style.background = type==='error'?'#ef5350':type==='success'?'#4caf50':'#333';
+      t.style.display = 'block'; setTimeout(function(){ t.style.display = 'none'; }, 3500);
+    }
+    function apiPost(path) {
+      return fetch(path, {method:'POST'}).then(function(r){ return r.json(); });
+    }
+    function startJob(areaId) {
+      showToast('Starting plan ' + areaId + '...', '');
+      apiPost('/api/robot/start_plan/' + areaId)
+        .then(function(d) {
+          if (d.ok) showToast('Plan ' + areaId + ' started', 'success');
+          else if (d.blocked) showToast('Blocked: ' + d.reason, 'error');
+          else showToast(JSON.stringify(d), 'error');
+        }).catch(function(e) { showToast('Error: ' + e.message, 'error'); });
+    }
+  </script>
+</body>
+</html>""".encode()
+
+
+def _mqtt_map_js(geo: dict) -> tuple:
+    """MQTT map feature layers and fitBounds box for *geo*."""
+    area_polygons_js = []
+    for area, color in zip(geo["areas"], cycle(AREA_COLORS)):
+        label = js_escape("%s (%s m\u00b2)" % (area["name"], round(area["area_sqm"])))
+        area_polygons_js.append(_AREA_JS % (area["points_json"], color, "0.25", '"%s"' % label))
+
+    charger_js = []
+    for cp in geo["chargers"]:
+        cp_icon, cp_color = _CHARGER_STYLE[bool(cp["enabled"])]
+        cp_name = js_escape(cp.get("name", ""))
+        label = js_escape(f"Charging: {cp_name} ({cp_icon})") if cp_name else js_escape(f"Charging ({cp_icon})")
+        charger_js.append(_CHARGER_JS % (cp["lat"], cp["lon"], cp_color, cp_color, label))
+
+    sidewalk_js = []
+    for sw in geo.get("sidewalks", []):
+        sw_name = js_escape(sw["name"])
+        sw_id = sw.get("id")
+        if sw_id is not None:
+            sw_popup = _START_POPUP % (sw_name, "", sw_id)
+        else:
+            sw_popup = '"%s"' % sw_name
+        sidewalk_js.append(_SIDEWALK_JS % (sw["points_json"], sw_popup))
+
+    all_js = "\n".join(chain(
+        area_polygons_js,
+        (_PATHWAY_JS % (pw["points_json"], js_escape(pw["name"])) for pw in geo["pathways"]),
+        (_NOGO_JS % (nz["points_json"], "#ef5350" if nz.get("enabled", True) else "#999",
+                     js_escape(nz.get("name", "No-Go Zone"))) for nz in geo["nogo"]),
+        (_SNOW_JS % sp["points_json"] for sp in geo.get("snow_piles", [])),
+        charger_js,
+        sidewalk_js,
+        (_FENCE_JS % ef["points_json"] for ef in geo.get("elec_fence", [])),
+        (_REF_MARKER_JS % (geo["ref_lat"], geo["ref_lon"]),),
+    ))
+    all_bounds_json = join_bounds_json(geo["areas"], geo.get("snow_piles", []), geo["nogo"])
+    return all_js.encode(), all_bounds_json.encode()
+
+
+def render_mqtt_map(geo: dict, source_label: str) -> Iterator[bytes]:
+    """Render the standalone Leaflet page for MQTT map geometry.
+
+    Yields UTF-8 chunks like :func:`render_dashboard`; *source_label* is
+    shown in the corner badge.
+    """
+    all_js, all_bounds_json = _cached_map_js("mqtt", geo, _mqtt_map_js)
+
+    yield _MQTT_MAP_HEAD
+    yield str(source_label).encode()
+    yield _MQTT_MAP_AFTER_SOURCE
+    yield str(geo["ref_lat"]).encode()
+    yield _MQTT_MAP_AFTER_LAT
+    yield str(geo["ref_lon"]).encode()
+    yield _MQTT_MAP_AFTER_LON
+    yield all_js
+    yield _MQTT_MAP_AFTER_MAP_JS
+    yield all_bounds_json
+    yield _MQTT_MAP_TAIL
+
+
+_MAP_VIEW_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <title>Yarbo Property Map</title>
+  <link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css" />
+  <script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+  <style>
+    * { margin:0; padding:0; }
+    html, body, #map { width:100%; height:100%; }
+  </style>
+</head>
+<body>
+  <div id="map"></div>
+  <script>
+    var osmLayer = L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+      maxZoom: 22, attribution: '&copy; OpenStreetMap'
+    });
+    var esriSat = L.tileLayer('https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}', {
+      maxZoom: 22, attribution: '&copy; Esri'
+    });
+    // One canvas for every vector layer: a single paint per frame, and
+    // shapes outside the padded viewport are clipped rather than drawn
+    var map = L.map('map', { layers: [osmLayer], renderer: L.canvas({ padding: 0.5 }) }).setView([""".encode()
+_MAP_VIEW_AFTER_LAT = """, """.encode()
+_MAP_VIEW_AFTER_LON = """], 17);
+    var areasLayer = L.layerGroup().addTo(map);
+    var pathwaysLayer = L.layerGroup().addTo(map);
+    var nogoLayer = L.layerGroup().addTo(map);
+    var snowLayer = L.layerGroup().addTo(map);
+    var sidewalksLayer = L.layerGroup().addTo(map);
+    var chargersLayer = L.layerGroup().addTo(map);
+    var markersLayer = L.layerGroup().addTo(map);
+    """.encode()
+_MAP_VIEW_AFTER_RASTER = """
+    """.encode()
+_MAP_VIEW_AFTER_MAP_JS = """
+    var baseLayers = { "OpenStreetMap": osmLayer, "Esri Satellite": esriSat };
+    var overlays = {};
+    if (rasterOverlay) overlays["Yarbo Satellite"] = rasterOverlay;
+    overlays["Areas"] = areasLayer;
+    overlays["Pathways"] = pathwaysLayer;
+    overlays["No-Go Zones"] = nogoLayer;
+    overlays["Snow Piles"] = snowLayer;
+    overlays["Sidewalks"] = sidewalksLayer;
+    overlays["Chargers"] = chargersLayer;
+    overlays["Reference Point"] = markersLayer;
+    L.control.layers(baseLayers, overlays).addTo(map);
+    var allPoints = """.encode()
+_MAP_VIEW_TAIL = """;
+    if (allPoints.length > 0) { map.fitBounds(allPoints, {padding: [30,30]}); }
+    function showToast(msg, type) {
+      var t = document.getElementById('toast');
+      if (!t) { t = document.createElement('div'); t.id='toast'; t.style.cssText='position:fixed;bottom:20px;left:50%;transform:translateX(-50%);padding:10px 20px;border-radius:8px;color:#fff;font-size:14px;z-index:9999;display:none;'; document.body.appendChild(t); }
+      t.textContent = msg; t.style.background = type==='error'?'#ef5350':type==='success'?'#4caf50':'#333';
+      t.style.display = 'block'; setTimeout(function(){ t.style.display = 'none'; }, 3500);
+    }
+    function apiPost(path) {
+      return fetch(path, {method:'POST'}).then(function(r){ return r.json(); });
+    }
+    function startJob(areaId) {
+      showToast('Starting plan ' + areaId + '...', '');
+      apiPost('/api/robot/start_plan/' + areaId)
+        .then(function(d) {
+          if (d.ok) showToast('Plan ' + areaId + ' started', 'success');
+          else if (d.blocked) showToast('Blocked: ' + d.reason, 'error');
+          else showToast(JSON.stringify(d), 'error');
+        }).catch(function(e) { showToast('Error: ' + e.message, 'error'); });
+    }
+  </script>
+</body>
+</html>""".encode()
+
+
+def _map_view_js(geo: dict) -> tuple:
+    """Property map feature layers and fitBounds box for *geo*."""
+    sidewalk_js = []
+    for sw in geo.get("sidewalks", []):
+        sw_name = sw["name"]
+        sw_id = sw.get("id")
+        if sw_id is not None:
+            sw_popup = _START_POPUP % (sw_name, "", sw_id)
+        else:
+            sw_popup = '"%s"' % sw_name
+        sidewalk_js.append(_SIDEWALK_JS % (sw["points_json"], sw_popup))
+
+    all_js = "\n".join(chain(
+        (_AREA_JS % (area["points_json"], "#4fc3f7", "0.2",
+                     '"%s (%s m\u00b2)"' % (area["name"], round(area["area_sqm"])))
+         for area in geo["areas"]),
+        (_PATHWAY_JS % (pw["points_json"], pw["name"]) for pw in geo["pathways"]),
+        (_NOGO_JS % (nz["points_json"], "#ef5350", "No-Go Zone") for nz in geo["nogo"]),
+        (_SNOW_JS % sp["points_json"] for sp in geo.get("snow_piles", [])),
+        sidewalk_js,
+        _station_js(geo["chargers"]),
+        (_REF_MARKER_JS % (geo["ref_lat"], geo["ref_lon"]),),
+    ))
+    all_bounds_json = join_bounds_json(geo["areas"], geo.get("snow_piles", []), geo.get("sidewalks", []))
+    return all_js.encode(), all_bounds_json.encode()
+
+
+def render_map_view(geo: dict) -> Iterator[bytes]:
+    """Render the standalone Leaflet property map for *geo* (UTF-8 chunks)."""
+    all_js, all_bounds_json = _cached_map_js("view", geo, _map_view_js)
+
+    yield _MAP_VIEW_HEAD
+    yield str(geo["ref_lat"]).encode()
+    yield _MAP_VIEW_AFTER_LAT
+    yield str(geo["ref_lon"]).encode()
+    yield _MAP_VIEW_AFTER_LON
+    yield build_raster_overlay_js(geo).encode()
+    yield _MAP_VIEW_AFTER_RASTER
+    yield all_js
+    yield _MAP_VIEW_AFTER_MAP_JS
+    yield all_bounds_json
+    yield _MAP_VIEW_TAIL
+
+
+# Event category → timeline dot / code colour
+_HISTORY_COLORS = MappingProxyType({
+    "completed": "#4caf50",
+    "started":   "#2196f3",
+    "paused":    "#ff9800",
+    "info":      "#ff9800",
+    "error":     "#f44336",
+})
+
+# Work history page; the only per-request slots are the two %(...)s fields.
+_HISTORY_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <meta http-equiv="refresh" content="300">
+  <title>Yarbo Work History</title>
+  <style>
+    :root {
+      --background: #f0f0f5; --card-bg: #fff;
+      --primary-text: #212121; --secondary-text: #727272;
+      --divider: rgba(0,0,0,.06);
+      --card-radius: 12px; --card-shadow: 0 1px 3px rgba(0,0,0,.1);
+    }
+    @media (prefers-color-scheme: dark) {
+      :root {
+        --background: #1b1b1f; --card-bg: #2c2c30;
+        --primary-text: #e3e3e8; --secondary-text: #9e9ea6;
+        --divider: rgba(255,255,255,.08); --card-shadow: 0 1px 4px rgba(0,0,0,.4);
+      }
+    }
+    * { margin:0; padding:0; box-sizing:border-box; }
+    body {
+      font-family: Roboto, -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif;
+      background: var(--background); color: var(--primary-text);
+      padding: 12px; max-width: 680px; margin: 0 auto;
+    }
+    h1 { font-size: 20px; font-weight: 500; margin: 8px 0 12px; }
+    .summary-bar {
+      display: flex; justify-content: space-between;
+      font-size: 13px; color: var(--secondary-text);
+      padding: 0 4px 12px;
+    }
+    .day-label {
+      font-size: 12px; font-weight: 500; color: var(--secondary-text);
+      text-transform: uppercase; letter-spacing: .05em;
+      padding: 16px 4px 6px;
+    }
+    .ha-card {
+      background: var(--card-bg); border-radius: 12px;
+      box-shadow: var(--card-shadow); overflow: hidden;
+    }
+    .event-row {
+      display: flex; align-items: center; gap: 10px;
+      padding: 10px 14px; border-bottom: 1px solid var(--divider);
+    }
+    .event-row:last-child { border-bottom: none; }
+    .event-time { font-size: 13px; color: var(--secondary-text); width: 38px; flex-shrink: 0; }
+    .event-dot { width: 9px; height: 9px; border-radius: 50%%; flex-shrink: 0; }
+    .event-desc { flex: 1; font-size: 14px; }
+    .event-code { font-size: 11px; font-weight: 500; font-family: monospace; flex-shrink: 0; }
+  </style>
+</head>
+<body>
+  <h1>Work History</h1>
+  %(summary_html)s
+  %(timeline_html)s
+</body>
+</html>"""
+
+
+def render_history(events: list) -> str:
+    """Render the work history timeline page for *events* (newest first)."""
+    # Count completions and find last completed date
+    completions = sum(1 for e in events if e["category"] == "completed")
+    last_completed = next((e for e in events if e["category"] == "completed"), None)
+    last_completed_str = ""
+    if last_completed and last_completed.get("timestamp"):
+        last_completed_str = datetime.fromtimestamp(last_completed["timestamp"]).strftime("%-d %b %Y")
+
+    # Group events by local date
+    by_day: "OrderedDict[str, list]" = OrderedDict()
+    for ev in events:
+        ts = ev.get("timestamp")
+        if ts:
+            day_key = datetime.fromtimestamp(ts).strftime("%A, %B %-d, %Y")
+        else:
+            day_key = "Unknown date"
+        by_day.setdefault(day_key, []).append(ev)
+
+    # Build event rows HTML
+    day_html_parts = []
+    for day_label, day_events in by_day.items():
+        rows = []
+        for ev in day_events:
+            ts = ev.get("timestamp")
+            time_str = datetime.fromtimestamp(ts).strftime("%H:%M") if ts else "--:--"
+            color = _HISTORY_COLORS.get(ev["category"], "#9e9e9e")
+            code = ev.get("code", "")
+            desc = ev.get("description", ev.get("title", ""))
+            rows.append(
+                f'<div class="event-row">'
+                f'  <div class="event-time">{time_str}</div>'
+                f'  <div class="event-dot" style="background:{color}"></div>'
+                f'  <div class="event-desc">{desc}</div>'
+                f'  <div class="event-code" style="color:{color}">{code}</div>'
+                f'</div>'
+            )
+        rows_html = "\n".join(rows)
+        day_html_parts.append(
+            f'<div class="day-label">{day_label}</div>'
+            f'<div class="ha-card">{rows_html}</div>'
+        )
+
+    timeline_html = "\n".join(day_html_parts) if day_html_parts else (
+        '<p style="color:var(--secondary-text);text-align:center;padding:32px 0">'
+        'No plan history available yet.</p>'
+    )
+
+    summary_html = ""
+    if completions:
+        summary_html = (
+            f'<div class="summary-bar">'
+            f'  <span>{completions} session{"s" if completions != 1 else ""} completed</span>'
+            + (f'  <span>Last: {last_completed_str}</span>' if last_completed_str else "")
+            + f'</div>'
+        )
+
+    return _HISTORY_PAGE % {"summary_html": summary_html, "timeline_html": timeline_html}
@@ -12,11 +12,15 @@ Usage:
 """
 
 import hashlib
-import os
 import struct
 import sys
 from pathlib import Path
 
+try:
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+except ImportError:
+    Cipher = None
+
 REPO_DIR = Path(__file__).parent
 KEY_FILE = REPO_DIR / ".encryption_key"
 
@@ -33,14 +37,12 @@ PROTECTED_FILES = [
 
 
 def get_key() -> bytes:
-    """Read the encryption key and derive a 32-byte AES key."""
+    """Read the encryption passphrase (AES key/IV are derived per file from it)."""
     if not KEY_FILE.exists():
         print(f"ERROR: Key file not found: {KEY_FILE}")
         print("Copy .encryption_key from a trusted machine.")
         sys.exit(1)
-    raw = KEY_FILE.read_text().strip()
-    # Derive a proper 32-byte key using SHA-256
-    return hashlib.sha256(raw.encode()).digest()
+    return KEY_FILE.read_text().strip().encode()
 
 
 def pad(data: bytes) -> bytes:
@@ -50,66 +52,86 @@ def pad(data: bytes) -> bytes:
 
 
 def unpad(data: bytes) -> bytes:
-    """Remove PKCS7 padding."""
+    """Remove PKCS7 padding; raises ValueError unless every pad byte matches."""
+    if not data or len(data) % 16:
+        raise ValueError("Invalid padding")
     pad_len = data[-1]
-    if pad_len < 1 or pad_len > 16:
+    if pad_len < 1 or pad_len > 16 or data[-pad_len:] != bytes([pad_len] * pad_len):
         raise ValueError("Invalid padding")
     return data[:-pad_len]
 
 
+OPENSSL_MAGIC = b"Salted__"
+
+
+def _evp_bytes_to_key(passphrase: bytes, salt: bytes) -> tuple:
+    """Derive (key, iv) the way ``openssl enc -salt -pass`` does.
+
+    EVP_BytesToKey with one SHA-256 round (OpenSSL >= 1.1 default), so the
+    files stay readable by ``openssl enc -d`` (pi_decrypt.sh).
+    """
+    derived = b""
+    block = b""
+    while len(derived) < 48:
+        block = hashlib.sha256(block + passphrase + salt).digest()
+        derived += block
+    return derived[:32], derived[32:48]
+
+
 def encrypt_file(src: Path, dst: Path, key: bytes):
-    """Encrypt a file with AES-256-CBC."""
+    """Encrypt a file with AES-256-CBC (OpenSSL ``Salted__`` format)."""
     import secrets
-    iv = secrets.token_bytes(16)
-    plaintext = src.read_bytes()
-
-    # Use OpenSSL-compatible format via subprocess (works everywhere)
-    import subprocess
-    openssl = _find_openssl()
-    result = subprocess.run(
-        [openssl, "enc", "-aes-256-cbc", "-salt",
-         "-pass", f"pass:{KEY_FILE.read_text().strip()}",
-         "-in", str(src), "-out", str(dst)],
-        capture_output=True
-    )
-    if result.returncode != 0:
-        print(f"  ERROR encrypting {src}: {result.stderr.decode()}")
-        return False
+    salt = secrets.token_bytes(8)
+    aes_key, iv = _evp_bytes_to_key(key, salt)
+    encryptor = Cipher(algorithms.AES(aes_key), modes.CBC(iv)).encryptor()
+    ciphertext = encryptor.update(pad(src.read_bytes())) + encryptor.finalize()
+    dst.write_bytes(OPENSSL_MAGIC + salt + ciphertext)
     return True
 
 
+def decrypt_bytes(data: bytes, key: bytes) -> bytes:
+    """Decrypt OpenSSL ``Salted__`` AES-256-CBC data; raises ValueError."""
+    if not data.startswith(OPENSSL_MAGIC) or len(data) < 32 or len(data) % 16:
+        raise ValueError("not an OpenSSL salted file")
+    aes_key, iv = _evp_bytes_to_key(key, data[8:16])
+    decryptor = Cipher(algorithms.AES(aes_key), modes.CBC(iv)).decryptor()
+    try:
+        return unpad(decryptor.update(data[16:]) + decryptor.finalize())
+    except ValueError:
+        raise ValueError("bad key or corrupt file") from None
+
+
 def decrypt_file(src: Path, dst: Path, key: bytes):
-    """Decrypt a file with AES-256-CBC."""
-    import subprocess
-    openssl = _find_openssl()
-    result = subprocess.run(
-        [openssl, "enc", "-aes-256-cbc", "-d", "-salt",
-         "-pass", f"pass:{KEY_FILE.read_text().strip()}",
-         "-in", str(src), "-out", str(dst)],
-        capture_output=True
-    )
-    if result.returncode != 0:
-        print(f"  ERROR decrypting {src}: {result.stderr.decode()}")
+    """Decrypt a file with AES-256-CBC (OpenSSL ``Salted__`` format)."""
+    try:
+        plaintext = decrypt_bytes(src.read_bytes(), key)
+    except ValueError as e:
+        print(f"  ERROR decrypting {src}: {e}")
         return False
+    dst.write_bytes(plaintext)
     return True
 
 
-def _find_openssl() -> str:
-    """Find OpenSSL binary."""
-    import shutil
-    # Git for Windows bundles OpenSSL
-    git_openssl = r"C:\Program Files\Git\usr\bin\openssl.exe"
-    if os.path.exists(git_openssl):
-        return git_openssl
-    found = shutil.which("openssl")
-    if found:
-        return found
-    print("ERROR: OpenSSL not found. Install Git for Windows or OpenSSL.")
-    sys.exit(1)
+def is_unchanged(src: Path, dst: Path, key: bytes) -> bool:
+    """True if *dst* already decrypts to the current contents of *src*."""
+    if not dst.exists():
+        return False
+    try:
+        return decrypt_bytes(dst.read_bytes(), key) == src.read_bytes()
+    except ValueError:
+        return False
+
+
+def _require_cryptography():
+    """Exit with a hint if the cryptography package is missing."""
+    if Cipher is None:
+        print("ERROR: the 'cryptography' package is required (pip install cryptography).")
+        sys.exit(1)
 
 
 def cmd_encrypt():
     """Encrypt all protected files."""
+    _require_cryptography()
     key = get_key()
     for rel in PROTECTED_FILES:
         src = REPO_DIR / rel
@@ -117,6 +139,10 @@ def cmd_encrypt():
         if not src.exists():
             print(f"  SKIP (missing): {rel}")
             continue
+        if is_unchanged(src, dst, key):
+            # Re-encrypting would only change the random salt (and git diff)
+            print(f"  unchanged: {rel}")
+            continue
         dst.parent.mkdir(parents=True, exist_ok=True)
         if encrypt_file(src, dst, key):
             print(f"  encrypted: {rel} -> {rel}.enc")
@@ -124,6 +150,7 @@ def cmd_encrypt():
 
 def cmd_decrypt():
     """Decrypt all .enc files."""
+    _require_cryptography()
     key = get_key()
     for rel in PROTECTED_FILES:
         src = REPO_DIR / (rel + ".enc")